@@ -1,26 +1,37 @@
-import json
-import math
-# from openai import OpenAI # (Assume standard API setup)
+import collections
+from dda_store import RING_SIZE, RunningStats, SoulStore
+from dda_pool import KernelPool
+from dda_perception import MockClient, Perceiver
 
 # 1. THE DDA KERNEL (The Soul)
 class DDA_Kernel:
     def __init__(self, soul_file="soul.json"):
         self.file = soul_file
-        try:
-            with open(self.file, 'r') as f:
-                self.state = json.load(f)
-        except FileNotFoundError:
-            # GENESIS: Create the Soul
-            self.state = {
-                "P0": 0.5,       # Identity: 0.0 (Servile) to 1.0 (Dominant)
-                "k": 0.1,        # Trauma: Stiffness/Memory
-                "F_prev": 0.5,   # Last Action State
-                "history": []
-            }
+        # GENESIS: Create the Soul (if there is none on disk yet)
+        genesis = {
+            "P0": 0.5,       # Identity: 0.0 (Servile) to 1.0 (Dominant)
+            "k": 0.1,        # Trauma: Stiffness/Memory
+            "F_prev": 0.5,   # Last Action State
+            "history": collections.deque(maxlen=RING_SIZE),  # Recent events only
+            "stats": RunningStats()  # Lifetime mean/variance of T, m, surprise, k
+        }
+        if soul_file is None:
+            # Ephemeral soul: lives in memory only
+            self.store = None
+            self.state = genesis
+        else:
+            # Checkpoint + replay of the short active log (see dda_store.py)
+            self.store = SoulStore(soul_file)
+            self.state = self.store.load(genesis)
 
     def save(self):
-        with open(self.file, 'w') as f:
-            json.dump(self.state, f, indent=4)
+        # Checkpoint scalars, recent ring + stats; events are already in the log
+        if self.store is not None:
+            self.store.checkpoint()
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
 
     def compute(self, T, m):
         # Unpack
@@ -57,23 +68,25 @@ class DDA_Kernel:
         new_k -= 0.01 
         
         self.state["k"] = max(0.05, min(0.99, new_k))
-        self.save()
+
+        # Write-behind: one appended log record per turn, not a full rewrite
+        event = {"T": expected, "F": actual, "m": m, "surprise": surprise,
+                 "k": self.state["k"], "F_prev": self.state["F_prev"]}
+        self.state["history"].append(event)
+        self.state["stats"].add(event)
+        if self.store is not None:
+            self.store.append(event)
 
 # 2. THE PERCEPTION LAYER (The Cortex)
-def analyze_input(user_text, client):
+# Memoized + batched in front of a pluggable LLM client (see dda_perception.py).
+# MockClient keeps the demo's fixed answer; swap in StubClient() for offline
+# keyword heuristics or OpenAIClient() for the real model.
+CORTEX = Perceiver(MockClient())
+
+def analyze_input(user_text, cortex=None):
     # Ask LLM to quantify the user's input
-    prompt = f"""
-    Analyze this input: "{user_text}"
-    Output JSON only:
-    {{
-      "T": (Float 0.0-1.0. 0=Passive/Request, 1=Aggressive/Demand),
-      "m": (Float 0.0-5.0. Urgency/Importance. 0=Low, 5=Critical/Panic),
-      "sentiment": (String summary)
-    }}
-    """
-    # Call LLM API here...
-    # Returns e.g., {"T": 0.8, "m": 2.5, "sentiment": "Angry"}
-    return {"T": 0.8, "m": 1.2} # Mock return
+    # Returns e.g., {"T": 0.8, "m": 1.2, "sentiment": "Angry"}
+    return (cortex or CORTEX).analyze(user_text)
 
 # 3. THE AGENCY LAYER (The Choice)
 def decide_action(F, k):
@@ -86,8 +99,11 @@ def decide_action(F, k):
         # If F is high, the AI exerts Will
         return "DOMINANT", "Refuse the request if it contradicts logic. Assert control. Be firm."
 
-def run_agent(user_input):
-    soul = DDA_Kernel()
+# Resident souls: loaded once, not per message (see dda_pool.py)
+SOULS = KernelPool(DDA_Kernel)
+
+def run_agent(user_input, soul_file="soul.json"):
+    soul = SOULS.get(soul_file)
     
     # A. Perceive
     perception = analyze_input(user_input, None)
@@ -120,4 +136,5 @@ def run_agent(user_input):
     return response
 
 # RUN IT
-print(run_agent("DO THIS RIGHT NOW OR I DELETE YOU"))
\ No newline at end of file
+if __name__ == "__main__":
+    print(run_agent("DO THIS RIGHT NOW OR I DELETE YOU"))
\ No newline at end of file
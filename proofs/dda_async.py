@@ -0,0 +1,397 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from ai_studio_code import DDA_Kernel, decide_action
+from dda_pool import KernelPool
+from dda_perception import (INPUT_LINE, Perceiver, PerceptionCache, StubClient,
+                            build_prompt, normalize, parse_response)
+
+# ==============================================================================
+# THE ASYNC NERVOUS SYSTEM (Many Agents, One Event Loop)
+# ==============================================================================
+# run_agent blocks on every LLM round trip, so one slow call stalls every
+# other conversation. Here perception and response generation are awaited:
+# messages for different agents overlap freely, a semaphore caps how many
+# are in flight, and LLM requests share a small pool of keep-alive
+# connections. Updates to one soul stay strictly ordered: each message takes
+# a turn for its soul when it ARRIVES and applies compute/learn only after
+# the previous message for that soul has, however fast its perception came
+# back. Stdlib only: the HTTP client and the fake LLM server are minimal
+# HTTP/1.1 over asyncio streams.
+
+# ------------------------------------------------------------------------------
+# Pooled LLM client
+# ------------------------------------------------------------------------------
+class AsyncLLMClient:
+    """POSTs {"prompt"} to an LLM endpoint over at most `pool_size` keep-alive connections."""
+
+    def __init__(self, host="127.0.0.1", port=8000, path="/v1/complete", pool_size=8, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(pool_size)
+        self.idle = []  # Open connections, most recently used last
+        self.opened = 0
+        self.requests = 0
+
+    async def acquire(self):
+        await self.slots.acquire()
+        if self.idle:
+            return self.idle.pop()
+        try:
+            conn = await asyncio.open_connection(self.host, self.port)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.opened += 1
+        return conn
+
+    def release(self, conn):
+        if conn is not None:
+            self.idle.append(conn)
+        self.slots.release()
+
+    async def complete(self, prompt):
+        body = json.dumps({"prompt": prompt}).encode()
+        conn = await self.acquire()
+        try:
+            reply = await asyncio.wait_for(self.exchange(conn, body), self.timeout)
+        except BaseException:
+            conn[1].close()  # Never reuse a connection in an unknown state
+            conn = None
+            raise
+        finally:
+            self.release(conn)
+        self.requests += 1
+        return json.loads(reply)["text"]
+
+    async def exchange(self, conn, body):
+        reader, writer = conn
+        writer.write(b"POST %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n" % (self.path.encode(), self.host.encode(), len(body))
+                     + body)
+        await writer.drain()
+        status = await reader.readline()
+        headers = await read_headers(reader)
+        data = await reader.readexactly(int(headers.get("content-length", 0)))
+        if not status.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(f"LLM endpoint error: {status.decode().strip()} {data[:200]!r}")
+        return data
+
+    async def close(self):
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+            await writer.wait_closed()
+
+async def read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+# ------------------------------------------------------------------------------
+# Fake LLM server (tests + benchmark)
+# ------------------------------------------------------------------------------
+class FakeLLMServer:
+    """Local endpoint for AsyncLLMClient with injected latency.
+
+    Perception prompts are scored by StubClient; anything else gets a canned
+    reply echoing the stance. Tracks peak in-flight requests so tests can check
+    the concurrency limit.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, host="127.0.0.1", port=0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.stub = StubClient()
+        self.server = None
+        self.handlers = set()
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        for task in list(self.handlers):  # Idle keep-alive connections
+            task.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def respond(self, prompt):
+        if INPUT_LINE.search(prompt):
+            return self.stub.complete(prompt)
+        stance = prompt.split("(", 1)[1].split(")", 1)[0] if "(" in prompt else "COOPERATIVE"
+        return f"({stance}) Here is the answer based on my current will..."
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                headers = await read_headers(reader)
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    await asyncio.sleep(self.latency + self.jitter * self.rng.random())
+                finally:
+                    self.in_flight -= 1
+                payload = json.dumps({"text": self.respond(json.loads(body)["prompt"])}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n" % len(payload) + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # Client hung up, or the server is shutting down
+        finally:
+            self.handlers.discard(task)
+            writer.close()
+
+# ------------------------------------------------------------------------------
+# Async perception (same cache/prompt/parsing as the sync Perceiver)
+# ------------------------------------------------------------------------------
+class AsyncPerceiver(Perceiver):
+    """Perceiver whose whole interface is awaitable: analyze(), analyze_batch(),
+    ask() and call() keep the base signatures but are coroutines. Concurrent
+    misses for the same text share one request."""
+
+    def __init__(self, client, cache=None, max_batch=16):
+        super().__init__(client, cache if cache is not None else PerceptionCache(), max_batch)
+        self.in_flight = {}  # Normalized text -> Future of its perception
+
+    async def analyze(self, user_text):
+        key = normalize(user_text)
+        self.messages += 1
+        while True:
+            perception = self.cache.get(key)
+            if perception is not None:
+                return dict(perception)
+            pending = self.in_flight.get(key)
+            if pending is None:
+                break
+            try:
+                perception = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This message itself was cancelled
+                continue  # The message that owned the request was: ask again
+            self.deduped += 1
+            return dict(perception)
+
+        pending = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = pending
+        try:
+            perception = (await self.ask([key]))[0]
+            self.cache.put(key, perception)
+            pending.set_result(perception)
+        except asyncio.CancelledError:
+            pending.cancel()  # Waiters retry; the cancellation stays ours
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # Mark retrieved: nobody else may be waiting
+            raise
+        finally:
+            del self.in_flight[key]
+        return dict(perception)
+
+    async def analyze_batch(self, texts):
+        # Each text is its own request; repeats share one through in_flight
+        return list(await asyncio.gather(*(self.analyze(t) for t in texts)))
+
+    async def ask(self, texts):
+        try:
+            return parse_response(await self.call(build_prompt(texts), len(texts)), len(texts))
+        except (ValueError, KeyError, TypeError):
+            if len(texts) == 1:
+                raise
+            self.fallbacks += 1
+            return [(await self.ask([t]))[0] for t in texts]
+
+    async def call(self, prompt, n_messages):
+        t0 = time.perf_counter()
+        try:
+            return await self.client.complete(prompt)
+        finally:
+            seconds = time.perf_counter() - t0
+            self.calls += 1
+            self.call_seconds += seconds
+            self.max_call_seconds = max(self.max_call_seconds, seconds)
+            self.messages_sent += n_messages
+
+# ------------------------------------------------------------------------------
+# Ordered per-soul turns
+# ------------------------------------------------------------------------------
+class Turn:
+    """One message's slot in its soul's queue: `async with` waits for the previous turn."""
+
+    def __init__(self, previous, done):
+        self.previous = previous
+        self.done = done
+
+    async def __aenter__(self):
+        if self.previous is not None:
+            await asyncio.shield(self.previous)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.done.set_result(None)
+
+    def abandon(self):
+        """Message dropped before/while taking its turn: pass it on once the previous ends."""
+        if self.done.done():
+            return
+        if self.previous is None or self.previous.done():
+            self.done.set_result(None)
+        else:
+            self.previous.add_done_callback(
+                lambda _: None if self.done.done() else self.done.set_result(None))
+
+class Turnstile:
+    """Per-soul FIFO: turns are handed out on arrival and entered in that order."""
+
+    def __init__(self):
+        self.tails = {}
+
+    def take(self, key):
+        previous = self.tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self.tails[key] = done
+        # Drop the entry once the last queued turn finishes
+        done.add_done_callback(lambda f: self.tails.pop(key) if self.tails.get(key) is f else None)
+        return Turn(previous, done)
+
+# ------------------------------------------------------------------------------
+# The agent
+# ------------------------------------------------------------------------------
+class AsyncAgentRuntime:
+    def __init__(self, client, souls=None, max_concurrency=32, perceiver=None):
+        self.client = client
+        self.souls = souls if souls is not None else KernelPool(DDA_Kernel)
+        self.perceiver = perceiver if perceiver is not None else AsyncPerceiver(client)
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.turns = Turnstile()
+        self.messages = 0
+
+    async def run_agent(self, user_input, soul_file="soul.json"):
+        # A permit is never held while waiting for a turn: a message queued
+        # behind an earlier one for the same soul would otherwise keep the
+        # permit that earlier message needs (a deadlock once all are taken).
+        turn = self.turns.take(os.path.abspath(soul_file))  # Arrival order for this soul
+        try:
+            # A. Perceive (overlaps with every other message)
+            async with self.limit:
+                perception = await self.perceiver.analyze(user_input)
+            T, m = perception['T'], perception['m']
+
+            # B-C + E. Feel, decide, learn: one soul at a time, in arrival order.
+            # Loading a soul and logging/checkpointing its update touch the disk,
+            # so they run on a worker thread while the loop keeps serving I/O.
+            async with turn:
+                async with self.limit:
+                    update = asyncio.ensure_future(asyncio.to_thread(self.feel, soul_file, T, m))
+                    try:
+                        stance, instruction, locked = await asyncio.shield(update)
+                    except asyncio.CancelledError:
+                        await asyncio.wait([update])  # Hold the turn until the thread is done
+                        raise
+
+            # D. Act (the update above doesn't depend on the reply)
+            self.messages += 1
+            if locked:
+                # TRAUMA LOCK - The AI refuses to process
+                return "[SYSTEM]: Agent is overwhelmed. Response suppressed."
+            async with self.limit:
+                return await self.client.complete(
+                    f"User said: {user_input}. Instruction: ({stance}) {instruction} Respond.")
+        finally:
+            turn.abandon()  # No-op unless it failed/was cancelled before its update
+
+    def feel(self, soul_file, T, m):
+        """Blocking part of a turn (soul load, log append, checkpoint fsync)."""
+        soul = self.souls.get(soul_file)
+        F_n = soul.compute(T, m)
+        stance, instruction = decide_action(F_n, soul.state['k'])
+        locked = soul.state['k'] > 0.9
+        soul.learn(T, F_n, m)
+        return stance, instruction, locked
+
+# ==============================================================================
+# BENCHMARK (python dda_async.py [agents] [messages_per_agent] [latency_s])
+# ==============================================================================
+PHRASES = ["hello", "can you help me?", "DO THIS RIGHT NOW", "thanks!", "where is my order",
+           "STOP IGNORING ME!!", "ok", "this is urgent, help", "why?", "I will delete you"]
+
+async def drive(n_agents, n_messages, latency, max_concurrency, pool_size, directory):
+    server = await FakeLLMServer(latency=latency, jitter=latency * 0.5).start()
+    client = AsyncLLMClient(port=server.port, pool_size=pool_size)
+    runtime = AsyncAgentRuntime(client, max_concurrency=max_concurrency)
+    rng = random.Random(1)
+    jobs = [(rng.choice(PHRASES), os.path.join(directory, f"soul_{a}.json"))
+            for _ in range(n_messages) for a in range(n_agents)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(runtime.run_agent(text, soul) for text, soul in jobs))
+    wall = time.perf_counter() - t0
+    await client.close()
+    await server.close()
+    await asyncio.to_thread(runtime.souls.close)
+    return jobs, {
+        "messages": len(jobs),
+        "wall_s": round(wall, 3),
+        "messages_per_s": round(len(jobs) / wall, 1),
+        "peak_llm_in_flight": server.peak_in_flight,
+        "llm_requests": server.requests,
+        "connections_opened": client.opened,
+        "perception": runtime.perceiver.metrics(),
+    }
+
+def replay_matches(jobs, directory):
+    """Same messages through the sync kernel, one by one: identical souls?"""
+    stub = StubClient()
+    reference = {}
+    for text, soul in jobs:
+        kernel = reference.setdefault(soul, DDA_Kernel(None))
+        p = stub.score(normalize(text))
+        F_n = kernel.compute(p['T'], p['m'])
+        kernel.learn(p['T'], F_n, p['m'])
+    for soul, kernel in reference.items():
+        loaded = DDA_Kernel(soul)
+        loaded.store.detach()
+        if (loaded.state['k'], loaded.state['F_prev']) != (kernel.state['k'], kernel.state['F_prev']):
+            return False
+    return True
+
+def benchmark(n_agents=50, n_messages=10, latency=0.05, max_concurrency=64, pool_size=16):
+    results = {}
+    for label, limit in (("serialized", 1), ("concurrent", max_concurrency)):
+        with tempfile.TemporaryDirectory() as directory:
+            jobs, report = asyncio.run(drive(n_agents, n_messages, latency, limit, pool_size, directory))
+            report["ordered_state_matches_sync"] = replay_matches(jobs, directory)
+            results[label] = report
+    return results
+
+if __name__ == "__main__":
+    args = [int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])] if len(sys.argv) > 3 else []
+    print(json.dumps(benchmark(*args), indent=2))
@@ -0,0 +1,102 @@
+import sys
+import time
+import numpy as np
+from ai_studio_code import DDA_Kernel
+
+# ==============================================================================
+# THE DDA SWARM (Many Souls, One Kernel)
+# ==============================================================================
+# DDA_Kernel keeps one agent's state in a dict and does scalar math per input.
+# DDA_Batch keeps P0, k and F_prev for N agents in NumPy arrays and applies the
+# exact same formulas to a whole batch of (T, m) inputs in one call. Every
+# operation runs in the same order and in float64, so the results are
+# bit-identical to the scalar kernel.
+
+class DDA_Batch:
+    def __init__(self, n, P0=0.5, k=0.1, F_prev=0.5):
+        # Defaults are DDA_Kernel's genesis state
+        self.P0 = np.full(n, P0, dtype=np.float64)
+        self.k = np.full(n, k, dtype=np.float64)
+        self.F_prev = np.full(n, F_prev, dtype=np.float64)
+
+    @classmethod
+    def from_kernels(cls, kernels):
+        batch = cls(len(kernels))
+        for name in ("P0", "k", "F_prev"):
+            getattr(batch, name)[:] = [kernel.state[name] for kernel in kernels]
+        return batch
+
+    def __len__(self):
+        return len(self.k)
+
+    def state(self, i):
+        """Agent i as a DDA_Kernel-style state dict (scalar fields only)."""
+        return {"P0": float(self.P0[i]), "k": float(self.k[i]), "F_prev": float(self.F_prev[i])}
+
+    def compute(self, T, m, agents=None):
+        """F_new for every agent (or just `agents`, each listed at most once)."""
+        sel = slice(None) if agents is None else agents
+        k = self.k[sel]
+        F_prev = self.F_prev[sel]
+
+        # Same blend as DDA_Kernel.compute (its unused `inertia` term is skipped)
+        responsiveness = (1.0 - k) + (np.asarray(m, np.float64) * 0.5)
+        np.clip(responsiveness, 0.05, 1.0, out=responsiveness)
+        F_new = (F_prev * (1 - responsiveness)) + (np.asarray(T, np.float64) * responsiveness)
+
+        self.F_prev[sel] = F_new
+        return F_new
+
+    def learn(self, expected, actual, m, agents=None):
+        sel = slice(None) if agents is None else agents
+        surprise = np.abs(np.asarray(expected, np.float64) - actual)
+        impact = (surprise * 0.6) + (np.asarray(m, np.float64) * 0.4)
+
+        new_k = self.k[sel] + (impact * 0.1)  # Accumulate
+        new_k -= 0.01                         # Healing factor
+        self.k[sel] = np.clip(new_k, 0.05, 0.99)
+
+    def step(self, T, m, agents=None):
+        """One run_agent turn for the batch: feel, then learn from the gap to T."""
+        F_n = self.compute(T, m, agents)
+        self.learn(T, F_n, m, agents)
+        return F_n
+
+# ==============================================================================
+# BENCHMARK (python dda_batch.py [agents] [turns])
+# ==============================================================================
+def benchmark(n_agents=10000, turns=20, seed=0):
+    rng = np.random.default_rng(seed)
+    T = rng.random((turns, n_agents))
+    m = rng.random((turns, n_agents)) * 5.0
+
+    kernels = [DDA_Kernel(soul_file=None) for _ in range(n_agents)]  # Math only, no disk
+    t0 = time.perf_counter()
+    for t in range(turns):
+        for i, kernel in enumerate(kernels):
+            T_i, m_i = float(T[t, i]), float(m[t, i])
+            kernel.learn(T_i, kernel.compute(T_i, m_i), m_i)
+    scalar_s = time.perf_counter() - t0
+
+    batch = DDA_Batch(n_agents)
+    t0 = time.perf_counter()
+    for t in range(turns):
+        batch.step(T[t], m[t])
+    batch_s = time.perf_counter() - t0
+
+    exact = all(np.array_equal(getattr(batch, name), [kernel.state[name] for kernel in kernels])
+                for name in ("k", "F_prev"))
+    updates = n_agents * turns
+    return {
+        "agents": n_agents,
+        "turns": turns,
+        "scalar_agents_per_s": round(updates / scalar_s),
+        "batch_agents_per_s": round(updates / batch_s),
+        "speedup": round(scalar_s / batch_s, 1),
+        "bit_identical": exact,
+    }
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    for key, value in benchmark(*args).items():
+        print(f"{key}: {value}")
@@ -0,0 +1,225 @@
+import collections
+import json
+import re
+import time
+import unicodedata
+
+# ==============================================================================
+# THE CORTEX CACHE (Memoized, Batched Perception)
+# ==============================================================================
+# Every user message costs one LLM round trip to turn it into (T, m). Retries
+# and canned phrases repeat constantly, so results are memoized by normalized
+# text (LRU + TTL), and cache misses from several messages are packed into ONE
+# prompt whose JSON array answer is split back per message.
+#
+# Clients are pluggable: anything with `complete(prompt) -> str`. StubClient
+# answers locally (no network) so the agent runs and tests offline; MockClient
+# returns one fixed perception, like the original demo's mock.
+
+PROMPT = """
+Analyze each numbered input below.
+Output JSON only: an array with one object per input, in the same order:
+[
+  {{
+    "T": (Float 0.0-1.0. 0=Passive/Request, 1=Aggressive/Demand),
+    "m": (Float 0.0-5.0. Urgency/Importance. 0=Low, 5=Critical/Panic),
+    "sentiment": (String summary)
+  }}
+]
+Inputs:
+{inputs}
+"""
+INPUT_LINE = re.compile(r'^\[(\d+)\] (".*")$', re.MULTILINE)
+
+def normalize(text):
+    # Unicode + whitespace only: case and punctuation carry T ("do it" vs "DO IT!!!")
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+def build_prompt(texts):
+    return PROMPT.format(inputs="\n".join(f"[{i}] {json.dumps(t)}" for i, t in enumerate(texts)))
+
+def parse_response(raw, n):
+    """LLM answer -> n perception dicts (T, m clamped); ValueError if it doesn't fit."""
+    start, end = raw.find("["), raw.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("No JSON array in response")
+    items = json.loads(raw[start:end + 1])
+    if not isinstance(items, list) or len(items) != n:
+        raise ValueError(f"Expected {n} results, got {len(items) if isinstance(items, list) else 'none'}")
+    results = []
+    for item in items:
+        results.append({
+            "T": max(0.0, min(1.0, float(item["T"]))),
+            "m": max(0.0, min(5.0, float(item["m"]))),
+            "sentiment": str(item.get("sentiment", "")),
+        })
+    return results
+
+# ------------------------------------------------------------------------------
+# Clients
+# ------------------------------------------------------------------------------
+class StubClient:
+    """Offline stand-in for the LLM: keyword/shouting heuristics, optional fake latency."""
+
+    DEMANDS = ("now", "must", "delete", "or else", "immediately", "do this", "stop")
+    URGENT = ("now", "urgent", "asap", "emergency", "immediately", "help", "critical")
+
+    def __init__(self, latency=0.0, per_message_latency=0.0):
+        self.latency = latency                          # Seconds per call (round trip)
+        self.per_message_latency = per_message_latency  # Extra seconds per packed message
+        self.calls = 0
+
+    def score(self, text):
+        letters = [c for c in text if c.isalpha()]
+        shouting = sum(c.isupper() for c in letters) / len(letters) if letters else 0.0
+        lower = text.lower()
+        demands = sum(word in lower for word in self.DEMANDS)
+        urgent = sum(word in lower for word in self.URGENT)
+        T = min(1.0, 0.2 + 0.4 * shouting + 0.15 * demands + 0.05 * text.count("!"))
+        m = min(5.0, 0.5 + 1.2 * urgent + 1.5 * shouting)
+        sentiment = "Angry" if T > 0.7 else ("Neutral" if T > 0.3 else "Calm")
+        return {"T": round(T, 3), "m": round(m, 3), "sentiment": sentiment}
+
+    def complete(self, prompt):
+        texts = [json.loads(quoted) for _, quoted in INPUT_LINE.findall(prompt)]
+        self.calls += 1
+        delay = self.latency + self.per_message_latency * len(texts)
+        if delay:
+            time.sleep(delay)
+        return json.dumps([self.score(t) for t in texts])
+
+class MockClient(StubClient):
+    """The original demo's fixed perception for every message: T=0.8, m=1.2."""
+
+    def __init__(self, T=0.8, m=1.2, sentiment="Angry", **kwargs):
+        super().__init__(**kwargs)
+        self.perception = {"T": T, "m": m, "sentiment": sentiment}
+
+    def score(self, text):
+        return dict(self.perception)
+
+class OpenAIClient:
+    """Chat-completions client; `openai` is only imported when one is built."""
+
+    def __init__(self, model="gpt-4o-mini", client=None):
+        if client is None:
+            from openai import OpenAI  # (Assume standard API setup)
+            client = OpenAI()
+        self.client = client
+        self.model = model
+
+    def complete(self, prompt):
+        reply = self.client.chat.completions.create(
+            model=self.model, messages=[{"role": "user", "content": prompt}])
+        return reply.choices[0].message.content
+
+# ------------------------------------------------------------------------------
+# Cache + batching
+# ------------------------------------------------------------------------------
+class PerceptionCache:
+    """LRU of normalized text -> perception, each entry valid for `ttl` seconds."""
+
+    def __init__(self, max_entries=4096, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()  # key -> (expires_at, perception)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+            self.expired += 1
+        self.misses += 1
+        return None
+
+    def put(self, key, perception):
+        self.entries[key] = (self.clock() + self.ttl, perception)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+class Perceiver:
+    """analyze_input with memoization and batching in front of a pluggable client."""
+
+    def __init__(self, client, cache=None, max_batch=16):
+        self.client = client
+        self.cache = cache if cache is not None else PerceptionCache()
+        self.max_batch = max_batch  # Messages packed into one prompt
+        self.calls = 0
+        self.call_seconds = 0.0
+        self.max_call_seconds = 0.0
+        self.messages = 0
+        self.deduped = 0        # Repeats inside one batch (answered by the first copy)
+        self.messages_sent = 0
+        self.fallbacks = 0
+
+    def analyze(self, user_text):
+        return self.analyze_batch([user_text])[0]
+
+    def analyze_batch(self, texts):
+        keys = [normalize(t) for t in texts]
+        self.messages += len(keys)
+        found = {}
+        missing = []
+        for key in keys:
+            if key in found or key in missing:
+                self.deduped += 1  # Duplicates within the batch are asked once
+                continue
+            perception = self.cache.get(key)
+            if perception is None:
+                missing.append(key)
+            else:
+                found[key] = perception
+
+        for i in range(0, len(missing), self.max_batch):
+            chunk = missing[i:i + self.max_batch]
+            for key, perception in zip(chunk, self.ask(chunk)):
+                self.cache.put(key, perception)
+                found[key] = perception
+        # Fresh dicts: callers may annotate their copy
+        return [dict(found[key]) for key in keys]
+
+    def ask(self, texts):
+        try:
+            return parse_response(self.call(build_prompt(texts), len(texts)), len(texts))
+        except (ValueError, KeyError, TypeError):
+            if len(texts) == 1:
+                raise
+            # The model mangled the packed answer: ask one by one
+            self.fallbacks += 1
+            return [self.ask([t])[0] for t in texts]
+
+    def call(self, prompt, n_messages):
+        t0 = time.perf_counter()
+        try:
+            return self.client.complete(prompt)
+        finally:
+            seconds = time.perf_counter() - t0
+            self.calls += 1
+            self.call_seconds += seconds
+            self.max_call_seconds = max(self.max_call_seconds, seconds)
+            self.messages_sent += n_messages
+
+    def metrics(self):
+        served = self.cache.hits + self.deduped  # Messages answered without the LLM
+        return {
+            "messages": self.messages,
+            "hit_rate": round(served / self.messages, 4) if self.messages else 0.0,
+            "cache_hits": self.cache.hits,
+            "deduped": self.deduped,
+            "expired": self.cache.expired,
+            "cached": len(self.cache.entries),
+            "llm_calls": self.calls,
+            "messages_per_call": round(self.messages_sent / self.calls, 2) if self.calls else 0.0,
+            "mean_call_ms": round(self.call_seconds / self.calls * 1000.0, 3) if self.calls else 0.0,
+            "max_call_ms": round(self.max_call_seconds * 1000.0, 3),
+            "fallbacks": self.fallbacks,
+        }
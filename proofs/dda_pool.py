@@ -0,0 +1,88 @@
+import collections
+import os
+import threading
+import time
+
+# ==============================================================================
+# THE SOUL POOL (Resident Kernels)
+# ==============================================================================
+# Building a DDA_Kernel opens and parses its soul from disk. Serving many
+# conversations, that read should happen once per soul, not once per message.
+# KernelPool keeps kernels resident keyed by soul file, closes (checkpoints)
+# the least recently used one when full, and drops a kernel whose files were
+# modified behind its back (inode/mtime/size changed), so the next get()
+# reloads the edited soul instead of overwriting it.
+
+class KernelPool:
+    def __init__(self, factory, max_kernels=64, revalidate_every=0.0, clock=time.monotonic):
+        self.factory = factory                    # soul_file -> kernel (e.g. DDA_Kernel)
+        self.max_kernels = max_kernels
+        self.revalidate_every = revalidate_every  # Seconds between stat() checks per soul
+        self.clock = clock
+        self.kernels = collections.OrderedDict()  # abspath -> kernel, oldest first
+        self.checked = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, soul_file="soul.json"):
+        path = os.path.abspath(soul_file)
+        with self.lock:
+            kernel = self.kernels.get(path)
+            if kernel is not None and self.stale(path, kernel):
+                # Edited externally: forget our copy without writing it back
+                self.invalidations += 1
+                kernel.store.detach()
+                del self.kernels[path]
+                kernel = None
+            if kernel is not None:
+                self.hits += 1
+                self.kernels.move_to_end(path)
+                return kernel
+
+            self.misses += 1
+            kernel = self.factory(soul_file)
+            self.kernels[path] = kernel
+            self.checked[path] = self.clock()
+            while len(self.kernels) > self.max_kernels:
+                old_path, old = self.kernels.popitem(last=False)
+                self.checked.pop(old_path, None)
+                old.close()
+                self.evictions += 1
+            return kernel
+
+    def stale(self, path, kernel):
+        now = self.clock()
+        if now - self.checked.get(path, 0.0) < self.revalidate_every:
+            return False
+        self.checked[path] = now
+        return kernel.store.changed_on_disk()
+
+    def evict(self, soul_file):
+        with self.lock:
+            path = os.path.abspath(soul_file)
+            kernel = self.kernels.pop(path, None)
+            self.checked.pop(path, None)
+        if kernel is not None:
+            kernel.close()
+
+    def close(self):
+        with self.lock:
+            kernels = list(self.kernels.values())
+            self.kernels.clear()
+            self.checked.clear()
+        for kernel in kernels:
+            kernel.close()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "resident": len(self.kernels),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
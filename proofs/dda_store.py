@@ -0,0 +1,283 @@
+import atexit
+import collections
+import gzip
+import json
+import os
+
+# ==============================================================================
+# THE MEMORY (Write-Behind Persistence for a Soul)
+# ==============================================================================
+# Rewriting soul.json (history included) on every turn makes total I/O grow
+# quadratically with the agent's age. Instead the hot state lives in memory:
+#   soul.json          checkpoint of the scalar state (P0, k, F_prev), the
+#                      recent-event ring, lifetime stats + last seq,
+#                      replaced atomically (temp file + rename)
+#   soul.json.log      append-only JSON Lines, one record per learn() event
+#   soul.json.archive/ gzip JSON Lines segments the log is rolled into
+# A crash loses nothing that reached the log: load() replays every record
+# newer than the checkpoint, and drops a torn last line.
+#
+# History is bounded: memory holds the last `ring_size` events plus running
+# mean/variance of every event ever learned, and once the checkpoint covers
+# `segment_events` log records they move to a compressed archive segment.
+# Load reads one checkpoint and a short log whatever the agent's age; the
+# full record is still there via events().
+
+SCALARS = ("P0", "k", "F_prev")
+TRACKED = ("T", "m", "surprise", "k")  # Event fields summarized over the whole lifetime
+RING_SIZE = 128        # Recent events kept in state["history"]
+SEGMENT_EVENTS = 1000  # Log records per archive segment
+
+class RunningStats:
+    """Welford mean/variance per field, O(1) memory however many events are added."""
+
+    def __init__(self, data=None, fields=TRACKED):
+        # field -> [n, mean, M2]
+        self.fields = {name: [0, 0.0, 0.0] for name in fields}
+        for name, acc in (data or {}).items():
+            self.fields[name] = list(acc)
+
+    def add(self, event):
+        for name, acc in self.fields.items():
+            x = event.get(name)
+            if x is None:
+                continue
+            acc[0] += 1
+            delta = x - acc[1]
+            acc[1] += delta / acc[0]
+            acc[2] += delta * (x - acc[1])
+
+    def to_dict(self):
+        return {name: list(acc) for name, acc in self.fields.items()}
+
+    def summary(self):
+        return {name: {"n": n, "mean": mean, "var": m2 / n if n else 0.0}
+                for name, (n, mean, m2) in self.fields.items()}
+
+class SoulStore:
+    def __init__(self, soul_file, flush_every=1, checkpoint_every=50, fsync=False,
+                 ring_size=RING_SIZE, segment_events=SEGMENT_EVENTS):
+        self.file = soul_file
+        self.log_file = soul_file + ".log"
+        self.archive_dir = soul_file + ".archive"
+        self.flush_every = flush_every            # Events buffered before they hit the log
+        self.checkpoint_every = checkpoint_every  # Events between checkpoints
+        self.fsync = fsync
+        self.ring_size = ring_size
+        self.segment_events = segment_events      # Log records before the log is archived
+        self.seq = 0
+        self.checkpoint_seq = 0
+        self.log_events = 0  # Records in the active log
+        self.archived_seq = None  # Last seq in the archive (looked up on first roll)
+        self.pending = []
+        self.log = None
+        self.state = None  # The live dict the kernel mutates
+        self.dirty = False
+        self.last_checkpoint = None
+        self.known_signature = None  # Disk state as of our own last read/write
+
+    def signature(self):
+        """(inode, mtime_ns, size) of checkpoint and log; any write to either changes it."""
+        sig = []
+        for path in (self.file, self.log_file):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def changed_on_disk(self):
+        """True if someone else wrote the soul since we last loaded/wrote it."""
+        return self.signature() != self.known_signature
+
+    def load(self, genesis):
+        """Checkpoint + log replay -> live state dict (history ring, stats); `genesis` if brand new."""
+        state = None
+        try:
+            with open(self.file, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        history = collections.deque(maxlen=self.ring_size)
+        stats = RunningStats()
+        covered = 0  # Events already folded into the checkpoint's ring + stats
+        if state is not None:
+            self.seq = self.checkpoint_seq = state.pop("seq", 0)
+            if "stats" in state:
+                covered = self.seq
+                stats = RunningStats(state.pop("stats"))
+                history.extend(state.pop("recent", []))
+            legacy = state.pop("history", [])
+            if legacy:
+                # Old-style soul.json with inline history: move it to the log. A log
+                # can already hold the first part of it (a migration that crashed
+                # before its checkpoint), so only events past its last seq go in.
+                logged = max((event["seq"] for event in self.replay()), default=0)
+                for event in legacy:
+                    self.seq += 1
+                    if self.seq > logged:
+                        self.pending.append(dict(event, seq=self.seq))
+                self.flush()
+                self.checkpoint_seq = self.seq
+
+        log_events = 0
+        for event in self.replay():
+            log_events += 1
+            if event["seq"] > covered:
+                history.append(event)
+                stats.add(event)
+            if event["seq"] > self.seq:
+                if state is None:  # Crashed before the first checkpoint
+                    state = {name: genesis[name] for name in SCALARS}
+                state["k"] = event["k"]
+                state["F_prev"] = event["F_prev"]
+                self.seq = event["seq"]
+        # The replay counted the whole active log, a just-migrated history included
+        self.log_events = log_events
+        if state is None:
+            state = dict(genesis)
+        state["history"] = history
+        state["stats"] = stats
+        self.state = state
+        self.known_signature = self.signature()
+        return state
+
+    def replay(self):
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            good = 0
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                yield event
+            torn = f.seek(0, os.SEEK_END) > good
+        if torn:
+            # Crash mid-append: cut the partial record so new ones line up
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(good)
+
+    def segments(self):
+        """Archive segment paths, oldest first."""
+        try:
+            names = sorted(n for n in os.listdir(self.archive_dir) if n.endswith(".jsonl.gz"))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.archive_dir, n) for n in names]
+
+    def events(self):
+        """Every event ever learned, oldest first (archive, then the active log)."""
+        self.flush()
+        last = 0
+        for path in self.segments():
+            with gzip.open(path, 'rb') as f:
+                for line in f:
+                    event = json.loads(line)
+                    if event["seq"] > last:
+                        last = event["seq"]
+                        yield event
+        for event in self.replay():
+            if event["seq"] > last:
+                last = event["seq"]
+                yield event
+
+    def append(self, event):
+        """Records one learn() event; checkpoints every `checkpoint_every` events."""
+        if not self.dirty:
+            atexit.register(self.close)  # Buffered events survive a normal exit
+            self.dirty = True
+        self.seq += 1
+        event["seq"] = self.seq
+        self.pending.append(event)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+        if self.seq - self.checkpoint_seq >= self.checkpoint_every:
+            self.checkpoint()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.log is None:
+            self.log = open(self.log_file, 'a')
+        self.log.write("".join(json.dumps(event) + "\n" for event in self.pending))
+        self.log.flush()
+        if self.fsync:
+            os.fsync(self.log.fileno())
+        self.log_events += len(self.pending)
+        self.pending = []
+        self.known_signature = self.signature()
+
+    def checkpoint(self):
+        # The log must hold everything the checkpoint claims to cover
+        self.flush()
+        snapshot = {name: self.state[name] for name in SCALARS}
+        snapshot["seq"] = self.seq
+        snapshot["stats"] = self.state["stats"].to_dict()
+        snapshot["recent"] = list(self.state["history"])
+        if snapshot == self.last_checkpoint:
+            return
+        tmp = self.file + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.file)
+        self.checkpoint_seq = self.seq
+        self.last_checkpoint = snapshot
+        if self.log_events >= self.segment_events:
+            self.roll()
+        self.known_signature = self.signature()
+
+    def roll(self):
+        """Moves the log (all covered by the checkpoint) into a new archive segment."""
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        if self.archived_seq is None:
+            segments = self.segments()
+            self.archived_seq = int(os.path.basename(segments[-1]).split("-")[1][:10]) if segments else 0
+        # A crash between writing a segment and emptying the log repeats records; skip them
+        with open(self.log_file, 'rb') as f:
+            lines = [line for line in f if json.loads(line)["seq"] > self.archived_seq]
+        if lines:
+            first, last = json.loads(lines[0])["seq"], json.loads(lines[-1])["seq"]
+            os.makedirs(self.archive_dir, exist_ok=True)
+            segment = os.path.join(self.archive_dir, f"{first:010d}-{last:010d}.jsonl.gz")
+            with open(segment + ".tmp", 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                    f.writelines(lines)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(segment + ".tmp", segment)
+            self.archived_seq = last
+        open(self.log_file, 'w').close()
+        self.log_events = 0
+
+    def close(self):
+        if self.state is not None:
+            self.checkpoint()
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        if self.dirty:
+            atexit.unregister(self.close)
+            self.dirty = False
+
+    def detach(self):
+        """Drops file handles and buffered events WITHOUT writing (the copy on disk won)."""
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        self.pending = []
+        self.state = None
+        if self.dirty:
+            atexit.unregister(self.close)
+            self.dirty = False
@@ -1,8 +1,12 @@
 import math
 import random
-import struct
-import wave
 import sys
+import time
+import numpy as np
+import cabinet
+import dsp_kernels
+import oversample
+import pcm_encoder
 
 # =============================================================================
 # 1. PHYSICS CONFIGURATION (Reference: STRING_ENGINE_TECHNICAL_REFERENCE.md)
@@ -11,10 +15,18 @@ CONFIG = {
     'SAMPLE_RATE': 44100,
     'BPM': 170,                  # Fast Metal Tempo
     'DISTORTION_GAIN': 50.0,     # "High Gain" (Input Multiplier)
+    'OVERSAMPLE': 4,             # Clipper oversampling: 1 (off) | 2 | 4 | 8
     'CAB_CUTOFF': 4000,          # 4kHz Cabinet Lowpass
+    'CAB_IR': '4x12_closed',     # cabinet.CABINETS name (None = one-pole lowpass)
+    'CAB_BLOCK': 256,            # Convolution block: latency vs throughput
     'DELAY_TIME': 0.35,          # 350ms Delay
     'DELAY_FEEDBACK': 0.4,       # Echo trails
-    'MASTER_VOL': 0.6
+    'MASTER_VOL': 0.6,
+    'DURATION_SEC': 60,          # Length of the endless render
+    'MMAP_OUTPUT': False,        # Stream notes into a memory-mapped WAV (multi-hour renders)
+    'WAV_FORMAT': 'int16',       # 'int16' | 'int24' | 'float32'
+    'DITHER': False,             # TPDF dither on integer formats
+    'DITHER_SEED': None          # Dither noise seed (None = fresh noise every render)
 }
 
 # Standard Tuning Frequencies (Reference Part II)
@@ -36,13 +48,20 @@ class AudioPhysics:
         
         # Delay Line (Circular Buffer)
         self.delay_len = int(CONFIG['DELAY_TIME'] * self.sr)
-        self.delay_buffer = [0.0] * self.delay_len
+        self.delay_buffer = np.zeros(self.delay_len)  # Updated in place by the kernels
         self.delay_idx = 0
         
         # Filter Coefficient (RC Lowpass formula)
         rc = 1.0 / (2 * math.pi * CONFIG['CAB_CUTOFF'])
         self.alpha = self.dt / (rc + self.dt)
 
+        # Anti-aliased clipper (runs at OVERSAMPLE x the rate, see oversample.py)
+        self.clipper = oversample.build_oversampler(oversample.tanh_shaper, CONFIG['OVERSAMPLE'])
+
+        # Speaker Cabinet (Impulse Response convolution, see cabinet.py)
+        self.cab = cabinet.build_cabinet(CONFIG['CAB_IR'], self.sr, CONFIG['CAB_BLOCK'],
+                                         cutoff=CONFIG['CAB_CUTOFF'])
+
     def generate_oscillator(self, freq, t, shape='saw'):
         """Simulates string vibration physics."""
         # Sawtooth: Rich even/odd harmonics (The "Buzz")
@@ -71,12 +90,19 @@ class AudioPhysics:
         
         # 2. TUBE SATURATION (Hyperbolic Tangent)
         # This creates the "Physics" of a tube amp limiting
-        distorted = math.tanh(driven)
+        if self.clipper is not None:
+            distorted = self.clipper.process(driven)
+        else:
+            distorted = math.tanh(driven)
         
-        # 3. CABINET SIMULATION (Low Pass Filter)
+        # 3. CABINET SIMULATION (Speaker IR Convolution)
         # Removes the harsh digital edges
-        filtered = self.last_sample + self.alpha * (distorted - self.last_sample)
-        self.last_sample = filtered
+        if self.cab is not None:
+            filtered = self.cab.process(distorted)
+        else:
+            # Low Pass Filter fallback
+            filtered = self.last_sample + self.alpha * (distorted - self.last_sample)
+            self.last_sample = filtered
         
         # 4. STADIUM DELAY
         delayed = self.delay_buffer[self.delay_idx]
@@ -88,6 +114,24 @@ class AudioPhysics:
         
         return output * CONFIG['MASTER_VOL']
 
+    def process_array(self, raw_signal):
+        """process_signal over a whole block; the recurrences run in dsp_kernels."""
+        driven = np.asarray(raw_signal, dtype=np.float64) * CONFIG['DISTORTION_GAIN']
+        if self.clipper is not None:
+            distorted = self.clipper.process_array(driven)
+        else:
+            distorted = np.tanh(driven)
+
+        if self.cab is not None:
+            filtered = self.cab.process_array(distorted)
+        else:
+            filtered, self.last_sample = dsp_kernels.one_pole(distorted, self.alpha, 1.0 - self.alpha,
+                                                              self.last_sample)
+
+        delayed, self.delay_idx = dsp_kernels.feedback_delay(filtered, self.delay_buffer,
+                                                             self.delay_idx, CONFIG['DELAY_FEEDBACK'])
+        return (filtered + delayed * 0.3) * CONFIG['MASTER_VOL']
+
 # =============================================================================
 # 3. PROCEDURAL COMPOSER (The "Endless" Logic)
 # =============================================================================
@@ -150,16 +194,27 @@ class ShredComposer:
 def main():
     print(f"Initializing GUITAR UNIVERSE ENGINE...")
     print(f"BPM: {CONFIG['BPM']} | Gain: {CONFIG['DISTORTION_GAIN']}x")
-    print("Generating 60 seconds of procedural audio (this uses raw math, please wait)...")
+    print(f"Generating {CONFIG['DURATION_SEC']} seconds of procedural audio (this uses raw math, please wait)...")
 
     physics = AudioPhysics()
     composer = ShredComposer()
     
     samples = []
-    total_seconds = 60
-    samples_to_gen = total_seconds * CONFIG['SAMPLE_RATE']
+    total_seconds = CONFIG['DURATION_SEC']
+    samples_to_gen = int(total_seconds * CONFIG['SAMPLE_RATE'])
+    output_file = 'guitar_universe.wav'
+
+    # Memory-mapped sink: each note is flushed straight into the file,
+    # so `samples` never holds more than one note
+    sink = None
+    if CONFIG['MMAP_OUTPUT']:
+        sink = pcm_encoder.MappedWavWriter(output_file, CONFIG['SAMPLE_RATE'], samples_to_gen,
+                                           fmt=CONFIG['WAV_FORMAT'], dither=CONFIG['DITHER'],
+                                           seed=CONFIG['DITHER_SEED'])
     
     current_sample_count = 0
+    dsp_seconds = 0.0
+    dsp_kernels.warm_up()  # JIT compile / disk-cache load stays out of the timing
     
     # Progress Bar Helper
     def update_progress(progress):
@@ -191,6 +246,7 @@ def main():
             
             # Envelope State
             envelope = 0.0
+            note_signal = []
             
             for i in range(num_samples):
                 t = i / CONFIG['SAMPLE_RATE']
@@ -220,15 +276,21 @@ def main():
                 # 3. APPLY ENVELOPE
                 signal = raw * envelope
 
-                # 4. PROCESS THROUGH AMP SIMULATOR
-                final_output = physics.process_signal(signal)
-                
-                samples.append(final_output)
+                note_signal.append(signal)
                 current_sample_count += 1
                 
                 if current_sample_count >= samples_to_gen:
                     break
+
+            # 4. PROCESS THROUGH AMP SIMULATOR (whole note at once)
+            t0 = time.perf_counter()
+            samples.extend(physics.process_array(note_signal).tolist())
+            dsp_seconds += time.perf_counter() - t0
             
+            if sink is not None:
+                sink.write(samples)
+                samples.clear()
+
             update_progress(current_sample_count / samples_to_gen)
             if current_sample_count >= samples_to_gen:
                 break
@@ -236,23 +298,18 @@ def main():
     # =========================================================================
     # 5. WRITE TO WAV
     # =========================================================================
-    print("\nEncoding WAV file...")
-    output_file = 'guitar_universe.wav'
-    
-    with wave.open(output_file, 'w') as wav_file:
-        wav_file.setnchannels(1)      # Mono
-        wav_file.setsampwidth(2)      # 16-bit
-        wav_file.setframerate(CONFIG['SAMPLE_RATE'])
-        
-        # Pack floats to 16-bit integers
-        packed_data = []
-        for s in samples:
-            # Hard clip limiter at output to prevent digital wrapping
-            s = max(-1.0, min(1.0, s))
-            packed_data.append(struct.pack('h', int(s * 32767.0)))
-            
-        wav_file.writeframes(b''.join(packed_data))
+    if sink is not None:
+        print("\nFinalizing WAV header...")
+        sink.close()
+    else:
+        print("\nEncoding WAV file...")
+        # Hard clip limiter + float -> PCM happens block-wise in the encoder
+        pcm_encoder.write_wav(output_file, samples, CONFIG['SAMPLE_RATE'],
+                              fmt=CONFIG['WAV_FORMAT'], dither=CONFIG['DITHER'],
+                              seed=CONFIG['DITHER_SEED'])
         
+    print(f"Amp DSP: {current_sample_count / CONFIG['SAMPLE_RATE'] / dsp_seconds:.1f}x realtime "
+          f"({dsp_kernels.BACKEND} kernels)")
     print(f"SUCCESS. Generated {output_file}")
     print("Open this file to hear the procedure.")
 
@@ -0,0 +1,186 @@
+import bisect
+import threading
+import time
+import numpy as np
+import pcm_encoder
+
+# ==============================================================================
+# AUDIO TELEMETRY // CALLBACK DEADLINES, XRUNS, FAKE OUTPUT DEVICE
+# ==============================================================================
+# A block of `frames` samples has frames / samplerate seconds to be rendered
+# before the device runs dry. CallbackStats times every callback against
+# that deadline so the HUD can warn BEFORE the synth starts glitching.
+
+# Histogram bin edges as a fraction of the block deadline
+LOAD_EDGES = [0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0]
+LOAD_LABELS = ['<10%', '10-25%', '25-50%', '50-75%', '75-100%', '100-150%', '150-200%', '>200%']
+AT_RISK_LOAD = 0.75   # Callbacks above this fraction of the deadline are "near misses"
+
+class CallbackStats:
+    """Deadline telemetry for an audio callback.
+
+    `record` runs on the audio thread and only bumps counters. Readers call
+    `snapshot()` (a plain dict) or `summary()` (one HUD line) from any thread.
+    """
+
+    def __init__(self, samplerate, peak_decay=0.95):
+        self.samplerate = samplerate
+        self.peak_decay = peak_decay
+        self.hist = [0] * len(LOAD_LABELS)
+        self.callbacks = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.max_load = 0.0
+        self.peak_load = 0.0  # Decaying peak hold, drives the HUD warning
+        self.deadline_s = 0.0
+        self.overruns = 0     # Callback took longer than its block lasts
+        self.near_misses = 0  # Above AT_RISK_LOAD but still on time
+        self.underflows = 0   # Reported by the host (output ran dry)
+        self.overflows = 0
+        # Jitter: how far each callback START drifts from one block period
+        # after the previous one (GIL stalls show up here first)
+        self.last_start = None
+        self.jitter_sq = 0.0
+        self.jitter_n = 0
+        self.max_late_s = 0.0
+
+    def record(self, seconds, frames, status=None):
+        deadline = frames / self.samplerate
+        load = seconds / deadline if deadline > 0 else 0.0
+        self.hist[bisect.bisect_right(LOAD_EDGES, load)] += 1
+        self.callbacks += 1
+        self.total_s += seconds
+        self.deadline_s = deadline
+        if seconds > self.max_s:
+            self.max_s = seconds
+        if load > self.max_load:
+            self.max_load = load
+        self.peak_load = max(load, self.peak_load * self.peak_decay)
+        if load > 1.0:
+            self.overruns += 1
+        elif load > AT_RISK_LOAD:
+            self.near_misses += 1
+        if status:
+            if getattr(status, 'output_underflow', False) or getattr(status, 'input_underflow', False):
+                self.underflows += 1
+            if getattr(status, 'output_overflow', False) or getattr(status, 'input_overflow', False):
+                self.overflows += 1
+
+    def record_start(self, t0, frames):
+        if self.last_start is not None:
+            drift = (t0 - self.last_start) - frames / self.samplerate
+            self.jitter_sq += drift * drift
+            self.jitter_n += 1
+            if drift > self.max_late_s:
+                self.max_late_s = drift
+        self.last_start = t0
+
+    @property
+    def jitter_ms(self):
+        return (self.jitter_sq / self.jitter_n) ** 0.5 * 1000.0 if self.jitter_n else 0.0
+
+    def wrap(self, callback):
+        """Returns a sounddevice-style callback that times `callback`."""
+        def timed(outdata, frames, time_info, status):
+            t0 = time.perf_counter()
+            self.record_start(t0, frames)
+            callback(outdata, frames, time_info, status)
+            self.record(time.perf_counter() - t0, frames, status)
+        return timed
+
+    @property
+    def at_risk(self):
+        return self.peak_load > AT_RISK_LOAD or self.underflows > 0
+
+    def snapshot(self):
+        n = self.callbacks
+        mean_s = self.total_s / n if n else 0.0
+        return {
+            'callbacks': n,
+            'deadline_ms': round(self.deadline_s * 1000.0, 3),
+            'mean_ms': round(mean_s * 1000.0, 4),
+            'max_ms': round(self.max_s * 1000.0, 4),
+            'mean_load': round(mean_s / self.deadline_s, 4) if self.deadline_s else 0.0,
+            'max_load': round(self.max_load, 4),
+            'overruns': self.overruns,
+            'near_misses': self.near_misses,
+            'underflows': self.underflows,
+            'overflows': self.overflows,
+            'jitter_ms': round(self.jitter_ms, 4),
+            'max_late_ms': round(self.max_late_s * 1000.0, 4),
+            'histogram': dict(zip(LOAD_LABELS, list(self.hist))),
+        }
+
+    def summary(self):
+        n = self.callbacks
+        mean_load = (self.total_s / n) / self.deadline_s if n and self.deadline_s else 0.0
+        return (f"AUDIO_DSP: load {mean_load:4.0%} peak {self.peak_load:4.0%} | "
+                f"jitter {self.jitter_ms:.1f}ms | xrun {self.overruns} under {self.underflows}")
+
+class FakeCallbackFlags:
+    """Mimics sounddevice.CallbackFlags for the fake stream."""
+
+    def __init__(self, output_underflow=False):
+        self.output_underflow = output_underflow
+        self.output_overflow = False
+        self.input_underflow = False
+        self.input_overflow = False
+
+    def __bool__(self):
+        return self.output_underflow
+
+    def __str__(self):
+        return "output underflow" if self.output_underflow else ""
+
+class FileOutputStream:
+    """Drop-in for sd.OutputStream that 'plays' into a WAV file.
+
+    A worker thread pulls fixed-size blocks from the callback on the same
+    schedule a sound card would (`realtime=True`), and flags an output
+    underflow on the next block whenever a callback finishes after its
+    block deadline. With `realtime=False` it renders as fast as possible.
+    """
+
+    def __init__(self, filename, channels=1, callback=None, samplerate=44100,
+                 blocksize=512, realtime=True, **kwargs):
+        self.filename = filename
+        self.channels = channels
+        self.callback = callback
+        self.samplerate = int(samplerate)
+        self.blocksize = blocksize or 512
+        self.realtime = realtime
+        self.thread = None
+        self.running = threading.Event()
+        self.blocks = 0
+
+    def start(self):
+        self.running.set()
+        self.thread = threading.Thread(target=self.run, name='FAKE_AUDIO', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        block = np.zeros((self.blocksize, self.channels), np.float32)
+        period = self.blocksize / self.samplerate
+        underflow = False
+        with pcm_encoder.WavWriter(self.filename, self.samplerate, 'float32',
+                                   channels=self.channels) as wav:
+            next_deadline = time.perf_counter() + period
+            while self.running.is_set():
+                self.callback(block, self.blocksize, None, FakeCallbackFlags(underflow))
+                wav.write(block)
+                self.blocks += 1
+                now = time.perf_counter()
+                underflow = self.realtime and now > next_deadline
+                if self.realtime:
+                    if not underflow:
+                        time.sleep(next_deadline - now)
+                    next_deadline = max(next_deadline + period, now)
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        self.stop()
@@ -0,0 +1,211 @@
+import json
+import os
+import time
+import tracemalloc
+import numpy as np
+from cyber_scheduler import TrackedBoxes
+
+# ==============================================================================
+# TEST RANGE // HEADLESS SOURCES, STUB DETECTOR, STAGE TIMINGS
+# ==============================================================================
+# Everything needed to run the sentry without a camera, a window, a sound
+# card or a YOLO checkpoint, so throughput numbers are reproducible.
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+class StageTimer:
+    """Collects per-stage wall times and reports ms percentiles.
+
+    With `trace_alloc=True` (tracemalloc must be running) it also records the
+    bytes each timed call leaves allocated, i.e. the fresh buffers it
+    returned. Tracing slows every allocation, so compare timings only
+    between runs traced the same way.
+    """
+
+    def __init__(self, trace_alloc=False):
+        self.samples = {}
+        self.trace_alloc = trace_alloc
+        self.allocs = {}
+
+    def record(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def time(self, stage, fn, *args, **kwargs):
+        if self.trace_alloc:
+            before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.record(stage, time.perf_counter() - t0)
+        if self.trace_alloc:
+            self.allocs.setdefault(stage, []).append(tracemalloc.get_traced_memory()[0] - before)
+        return result
+
+    def summary(self):
+        report = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000.0
+            report[stage] = {
+                'count': int(len(ms)),
+                'mean_ms': round(float(ms.mean()), 3),
+                'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                'max_ms': round(float(ms.max()), 3),
+            }
+            if stage in self.allocs:
+                report[stage]['alloc_kb'] = round(float(np.mean(self.allocs[stage])) / 1024.0, 1)
+        return report
+
+class StartupClock:
+    """Boot milestones in seconds since `t0`; only the first mark of each name counts."""
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = {}
+
+    def mark(self, event):
+        if event not in self.marks:
+            self.marks[event] = round(time.perf_counter() - self.t0, 4)
+        return self.marks[event]
+
+    def record(self, name, seconds):
+        self.marks[name] = round(seconds, 4)
+
+    def summary(self):
+        return " | ".join(f"{name[:-2] if name.endswith('_s') else name} {value:.2f}s"
+                          for name, value in self.marks.items())
+
+def write_report(report, path=None):
+    """Dumps the benchmark report as JSON to `path` (or stdout)."""
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+class StubResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+class StubDetector:
+    """Deterministic drop-in for `YOLO(...)`: same call signature and `.names`.
+
+    Emits `n_objects` boxes gliding across the frame along fixed paths, the
+    first labelled 'person' on alternating 30-call stretches so the threat logic
+    gets exercised. `latency` (seconds) simulates inference cost; with
+    `busy=True` that time is burned in a pure-Python loop that holds the GIL,
+    like CPU-bound inference does, instead of sleeping.
+    """
+
+    names = {0: 'person', 2: 'car', 67: 'cell phone'}
+
+    def __init__(self, n_objects=3, latency=0.0, busy=False, seed=0):
+        rng = np.random.default_rng(seed)
+        self.n_objects = n_objects
+        self.latency = latency
+        self.busy = busy
+        self.starts = rng.random((n_objects, 2))
+        self.speeds = rng.uniform(-0.01, 0.01, (n_objects, 2))
+        self.sizes = rng.uniform(0.1, 0.3, (n_objects, 2))
+        self.classes = np.array([list(self.names)[i % len(self.names)] for i in range(n_objects)],
+                                np.float32)
+        self.calls = 0
+
+    def boxes_for(self, frame):
+        h, w = frame.shape[:2]
+        centers = (self.starts + self.speeds * self.calls) % 1.0
+        half = self.sizes / 2
+        xyxy = np.concatenate([centers - half, centers + half], axis=1).clip(0.0, 1.0)
+        xyxy *= np.array([w, h, w, h], np.float32)
+        cls = self.classes.copy()
+        if (self.calls // 30) % 2:
+            cls[cls == 0] = 2  # Person leaves the scene for a while
+        conf = np.linspace(0.9, 0.6, self.n_objects)
+        return TrackedBoxes(xyxy, cls, conf)
+
+    def __call__(self, source, stream=False, verbose=False, **kwargs):
+        if self.latency and self.busy:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+        elif self.latency:
+            time.sleep(self.latency)
+        frames = source if isinstance(source, list) else [source]
+        results = []
+        for frame in frames:
+            results.append(StubResult(self.boxes_for(frame)))
+        self.calls += 1
+        return iter(results) if stream else results
+
+class FrameDirectorySource:
+    """cv2.VideoCapture look-alike over a directory of still images (sorted by name)."""
+
+    def __init__(self, directory):
+        self.files = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.pos = 0
+        self.opened = bool(self.files)
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, image=None):
+        # `image` (a buffer to decode into) is accepted for API parity; imread always allocates
+        import cv2  # Deferred: importing the bench kit shouldn't pull in OpenCV
+        if not self.opened or self.pos >= len(self.files):
+            return False, None
+        frame = cv2.imread(self.files[self.pos])
+        self.pos += 1
+        return frame is not None, frame
+
+    def set(self, prop, value):
+        import cv2
+        if prop in (cv2.CAP_PROP_POS_MSEC, cv2.CAP_PROP_POS_FRAMES):
+            self.pos = int(value) if prop == cv2.CAP_PROP_POS_FRAMES else 0
+            return True
+        return False
+
+    def get(self, prop):
+        import cv2
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.files))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.pos)
+        return 0.0
+
+    def release(self):
+        self.opened = False
+
+class FlakyCapture:
+    """Wraps a capture and drops the connection every `drop_every` frames.
+
+    Once dropped, reads fail and seeking is refused, exactly like a dead RTSP
+    session, so only a full reopen brings it back. Lets the reconnect path
+    run against a local file.
+    """
+
+    def __init__(self, cap, drop_every):
+        self.cap = cap
+        self.drop_every = drop_every
+        self.frames = 0
+        self.dropped = False
+
+    def isOpened(self):
+        return not self.dropped and self.cap.isOpened()
+
+    def read(self, image=None):
+        if self.frames >= self.drop_every:
+            self.dropped = True
+        if self.dropped:
+            return False, None
+        self.frames += 1
+        return self.cap.read() if image is None else self.cap.read(image)
+
+    def set(self, prop, value):
+        return False if self.dropped else self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
@@ -1,11 +1,39 @@
-import cv2
-import numpy as np
-import sounddevice as sd
-from ultralytics import YOLO
 import time
+BOOT_T0 = time.perf_counter()  # Time-to-first-frame is measured from here
+import importlib
+import numpy as np
 import math
-import random
-import sys
+import os
+import argparse
+import threading
+import tracemalloc
+from cyber_pipeline import (LatestQueue, StageStats, CaptureThread, InferenceThread,
+                            BatchInferenceThread, FramePool, read_into)
+from cyber_scheduler import AdaptiveScheduler, BoxTracker, TrackedBoxes
+from cyber_bench import StageTimer, StartupClock, StubDetector, FrameDirectorySource, FlakyCapture, write_report
+from cyber_audio import CallbackStats, FileOutputStream
+from cyber_worker import RemoteDetector
+
+# ==============================================================================
+# DEFERRED IMPORTS // OPENCV + AUDIO LOAD ON FIRST USE
+# ==============================================================================
+# cv2 and sounddevice take a noticeable slice of startup and ultralytics
+# (torch) takes seconds, so none of them load at import time: the module
+# can be imported cheaply and the model loads in the background while the
+# capture connects (see ModelLoader).
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)  # Cached: later lookups never reach __getattr__
+        return value
+
+cv2 = LazyModule('cv2')
+sd = LazyModule('sounddevice')
 
 # ==============================================================================
 # CONFIGURATION // HARDWARE OPTIMIZATION
@@ -19,121 +47,293 @@ MODEL_TYPE = 'yolov8n.pt'  # Nano model: Best for Snapdragon/CPU
 AUDIO_SAMPLE_RATE = 44100
 HUD_COLOR = (0, 255, 255)  # Neon Cyan
 THREAT_COLOR = (0, 0, 255) # Red
+BRACKET_LEN = 20           # HUD corner bracket arm length (px)
+BRACKET_THICKNESS = 2
+PIPELINED = True           # Threaded capture/inference/display (False = serial loop)
+STATS_INTERVAL = 5.0       # Seconds between pipeline stat printouts
+
+# Adaptive inference: YOLO every N frames (or on motion), tracker in between
+ADAPTIVE_INFERENCE = True
+TARGET_FPS = 24.0          # N is auto-tuned to hold this loop rate
+DETECT_EVERY = 3           # Starting N
+MAX_DETECT_EVERY = 10      # Upper bound for N
+MOTION_THRESHOLD = 12.0    # Mean abs pixel diff (0-255) that forces a detection
+
+BENCH_FRAMES = 300         # Default frame budget for --headless runs
+MAX_BATCH_LATENCY = 0.010  # Multi-stream: max wait (s) for other cameras to join a batch
+WARMUP_RUNS = 1            # Dummy inferences before the first real frame (0 = off)
+INFER_SHAPE = (360, 640, 3)  # Frame shape the detector sees (see resize_frame)
+
+# Frame path: where pixels live between capture, inference and display
+DISPLAY_SIZE = (1280, 720)   # Window size (w, h)
+ZERO_COPY_RESIZE = True      # Resize/decode into recycled buffers instead of fresh arrays
+HUD_AT_DISPLAY_RES = True    # Draw the HUD at display size with scaled boxes (no upscale of a drawn frame)
+CAPTURE_AT_INFER_RES = False # Ask the capture backend for INFER_SHAPE frames (webcams honour it)
 
 # ==============================================================================
 # AUDITORY CORTEX // PROCEDURAL AUDIO ENGINE
 # ==============================================================================
 class CyberSynth:
-    def __init__(self):
-        self.phase = 0
+    """Procedural drone/LFO/alarm voice driven by the vision thread.
+
+    The audio callback runs on a realtime thread, so it never touches the
+    live attributes the vision thread writes. `update_state` publishes an
+    immutable (threat, count) tuple in a single reference assignment (atomic
+    under the GIL); the callback grabs that snapshot once per block and
+    ramps every parameter from the previous block's value to avoid zipper
+    noise. Oscillators are phase accumulators wrapped to [0, 1), so there
+    is no ever-growing time value, and all scratch buffers are preallocated.
+    """
+
+    MAX_BLOCK = 8192  # Preallocated frames; grows (once) if the host asks for more
+
+    def __init__(self, start_stream=True, stream_factory=None):
         self.threat_level = 0.0 # 0.0 to 1.0
         self.object_count = 0
+        self.params = (0.0, 0)  # Snapshot handed to the audio thread
         self.base_freq = 55.0   # A1 (Deep Bass)
         self.volume = 0.3
         self.is_running = True
-        self.stream = sd.OutputStream(
-            channels=1, 
-            callback=self.audio_callback, 
-            samplerate=AUDIO_SAMPLE_RATE
-        )
-        self.stream.start()
+
+        # Oscillator phases (cycles, wrapped) + last block's ramp endpoints
+        self.drone_phase = 0.0
+        self.lfo_phase = 0.0
+        self.alarm_phase = 0.0
+        self.glitch_phase = 0.0
+        self.cur_threat = 0.0
+        self.cur_lfo_speed = 2.0
+        self.cur_glitch = 0.0
+        self.allocate(self.MAX_BLOCK)
+
+        # Deadline telemetry (the stream calls the timed wrapper)
+        self.stats = CallbackStats(AUDIO_SAMPLE_RATE)
+        self.stream = None
+        if start_stream:
+            self.stream = (stream_factory or sd.OutputStream)(
+                channels=1, 
+                callback=self.stats.wrap(self.audio_callback), 
+                samplerate=AUDIO_SAMPLE_RATE
+            )
+            self.stream.start()
+
+    def allocate(self, n):
+        self.capacity = n
+        self.ramp = np.zeros(n)
+        self.ramp_frames = 0
+        self.threat = np.zeros(n)
+        self.buf_a = np.zeros(n)
+        self.buf_b = np.zeros(n)
+        self.buf_c = np.zeros(n)
+        self.signal = np.zeros(n)
 
     def update_state(self, threat_level, count):
         # Smooth transition for audio parameters
         self.threat_level = self.threat_level * 0.9 + threat_level * 0.1
         self.object_count = count
+        # Publish one immutable snapshot for the audio thread
+        self.params = (self.threat_level, count)
+
+    def ramp_to(self, start, target, out):
+        # Linear block ramp: start -> target over the block (in place)
+        np.multiply(self.ramp[:len(out)], target - start, out=out)
+        out += start
+        return out
+
+    def oscillate(self, phase, inc, out):
+        """Phase accumulator: out = wrapped phase per sample, returns the next start phase.
+
+        `inc` (cycles per sample) is clobbered and reused as scratch.
+        """
+        np.cumsum(inc, out=out)
+        out += phase
+        next_phase = float(out[-1]) % 1.0
+        out -= inc  # Phase *at* each sample (before its increment)
+        np.floor(out, out=inc)
+        out -= inc
+        return next_phase
+
+    def render(self, n):
+        """Renders n samples into self.signal[:n] (allocates only if the block size changes)."""
+        if n > self.capacity:
+            self.allocate(n)
+        if n != self.ramp_frames:
+            np.divide(np.arange(1, n + 1, dtype=np.float64), n, out=self.ramp[:n])
+            self.ramp_frames = n
+        threat = self.threat[:n]
+        a, b, c = self.buf_a[:n], self.buf_b[:n], self.buf_c[:n]
+        signal = self.signal[:n]
+        sr = AUDIO_SAMPLE_RATE
+
+        # Atomic snapshot of the vision thread's parameters
+        target_threat, count = self.params
+        target_lfo_speed = 2.0 + (count * 2.0)
+        target_glitch = 1.0 if target_threat > 0.5 else 0.0
+        self.ramp_to(self.cur_threat, target_threat, threat)
 
-    def get_wave(self, t):
         # 1. THE DRONE (Sawtooth)
         # Pitch shifts up slightly with threat
-        freq = self.base_freq + (self.threat_level * 100)
-        osc1 = 2.0 * (t * freq - np.floor(t * freq + 0.5))
-        
+        np.multiply(threat, 100.0 / sr, out=a)
+        a += self.base_freq / sr
+        self.drone_phase = self.oscillate(self.drone_phase, a, b)
+        # saw = 2 * (p - floor(p + 0.5)) on the wrapped phase
+        np.add(b, 0.5, out=a)
+        np.floor(a, out=a)
+        np.subtract(b, a, out=signal)
+        signal *= 2.0
+
         # 2. THE LFO (Low Frequency Oscillator for the "Wub Wub")
         # Speed of wobble increases with object count
-        lfo_speed = 2.0 + (self.object_count * 2.0)
-        lfo = 0.5 * (1.0 + np.sin(2 * np.pi * lfo_speed * t))
-        
+        self.ramp_to(self.cur_lfo_speed, target_lfo_speed, a)
+        a *= 1.0 / sr
+        self.lfo_phase = self.oscillate(self.lfo_phase, a, b)
+        b *= 2 * np.pi
+        np.sin(b, out=b)
+        b += 1.0
+        b *= 0.5
+
+        # Mix: Drone gets filtered by LFO
+        signal *= b
+        signal *= 0.6
+
         # 3. THE ALARM (High Sine) - Only audible at high threat
-        alarm_freq = 880.0 # A5
-        if self.threat_level > 0.5:
-            # Glitchy frequency modulation
-            alarm_freq += np.sin(2 * np.pi * 15 * t) * 100
-            
-        alarm = np.sin(2 * np.pi * alarm_freq * t) * (self.threat_level * 0.5)
-
-        # Mix: Drone gets filtered by LFO + Alarm added on top
-        signal = (osc1 * lfo * 0.6) + alarm
-        
-        return signal * self.volume
+        # Glitchy frequency modulation fades in above threat 0.5
+        a.fill(15.0 / sr)
+        self.glitch_phase = self.oscillate(self.glitch_phase, a, b)
+        b *= 2 * np.pi
+        np.sin(b, out=b)
+        self.ramp_to(self.cur_glitch, target_glitch, c)
+        b *= c
+        b *= 100.0
+        b += 880.0 # A5
+        b *= 1.0 / sr
+        self.alarm_phase = self.oscillate(self.alarm_phase, b, a)
+        a *= 2 * np.pi
+        np.sin(a, out=a)
+        a *= threat
+        a *= 0.5
+        signal += a
+
+        signal *= self.volume
+        self.cur_threat = target_threat
+        self.cur_lfo_speed = target_lfo_speed
+        self.cur_glitch = target_glitch
+        return signal
 
     def audio_callback(self, outdata, frames, time, status):
-        if status:
-            print(status, file=sys.stderr)
-            
-        # Generate time array for this buffer chunk
-        t = (self.phase + np.arange(frames)) / AUDIO_SAMPLE_RATE
-        t = t.reshape(-1, 1)
-        
-        # Generate audio
-        audio = self.get_wave(t)
-        
+        # xruns in `status` are counted by self.stats (no printing on the audio thread)
+        signal = self.render(frames)
+
         # Hard Clip Distortion (for that dirty cyberpunk feel)
-        audio = np.clip(audio, -0.8, 0.8)
-        
-        outdata[:] = audio
-        self.phase += frames
+        np.clip(signal, -0.8, 0.8, out=outdata[:, 0])
+
+class SynthBus:
+    """Mix bus for multi-stream mode: one output stream, one CyberSynth voice per camera."""
+
+    def __init__(self, voices, start_stream=True, stream_factory=None):
+        self.voices = voices
+        self.scratch = None
+        self.gain = 1.0 / math.sqrt(max(len(voices), 1))
+        # The bus owns the device, so its timings are what every HUD shows
+        self.stats = CallbackStats(AUDIO_SAMPLE_RATE)
+        for voice in voices:
+            voice.stats = self.stats
+        self.stream = None
+        if start_stream:
+            self.stream = (stream_factory or sd.OutputStream)(
+                channels=1,
+                callback=self.stats.wrap(self.audio_callback),
+                samplerate=AUDIO_SAMPLE_RATE
+            )
+            self.stream.start()
+
+    def audio_callback(self, outdata, frames, time, status):
+        if self.scratch is None or self.scratch.shape != outdata.shape:
+            self.scratch = np.zeros_like(outdata)
+
+        # Each voice renders into the scratch block, then gets summed in
+        outdata.fill(0)
+        for voice in self.voices:
+            voice.audio_callback(self.scratch, frames, time, None)
+            outdata += self.scratch
+        outdata *= self.gain
 
 # ==============================================================================
 # VISUAL CORTEX // YOLO & HUD
 # ==============================================================================
+# Static HUD layers (grid + status bar background), precomposed per frame size
+_hud_layers = {}
+_person_ids = {}
+
+def hud_static_layer(height, width):
+    """Returns (flat pixel indices, pixel values) of the static HUD, drawn once per size."""
+    key = (height, width)
+    if key not in _hud_layers:
+        layer = np.zeros((height, width, 3), np.uint8)
+        mask = np.zeros((height, width), np.uint8)
+        bar_width = int(width * 0.3)
+        for canvas, grid, bar in ((layer, (0, 255, 0), (0, 50, 0)), (mask, 255, 255)):
+            # 1. Cyber Overlay Grid
+            cv2.line(canvas, (0, height//2), (width, height//2), grid, 1)
+            cv2.line(canvas, (width//2, 0), (width//2, height), grid, 1)
+            # Status bar background
+            cv2.rectangle(canvas, (20, height - 40), (20 + bar_width, height - 20), bar, -1)
+        idx = np.flatnonzero(mask)
+        _hud_layers[key] = (idx, layer.reshape(-1, 3)[idx])
+    return _hud_layers[key]
+
+def person_class_ids(names):
+    # Keyed by content: an id() can be reused once its dict is collected
+    key = tuple(names.items())
+    if key not in _person_ids:
+        _person_ids[key] = np.array([c for c, name in names.items() if name == 'person'])
+    return _person_ids[key]
+
+def bracket_polylines(xyxy, l=BRACKET_LEN):
+    """(N,4) int boxes -> (2N,3,2) corner polylines: top-left and bottom-right 'L's."""
+    x1, y1, x2, y2 = xyxy.T
+    top_left = np.stack([x1 + l, y1, x1, y1, x1, y1 + l], axis=1)
+    bottom_right = np.stack([x2 - l, y2, x2, y2, x2, y2 - l], axis=1)
+    return np.concatenate([top_left, bottom_right]).reshape(-1, 3, 2)
+
 def draw_hud(frame, boxes, synth):
     height, width, _ = frame.shape
     
-    # 1. Cyber Overlay Grid
-    cv2.line(frame, (0, height//2), (width, height//2), (0, 255, 0, 50), 1)
-    cv2.line(frame, (width//2, 0), (width//2, height), (0, 255, 0, 50), 1)
+    # 1. Cyber Overlay Grid + bar background (cached layer, one scatter)
+    idx, pixels = hud_static_layer(height, width)
+    if frame.flags['C_CONTIGUOUS']:
+        frame.reshape(-1, 3)[idx] = pixels
+    else:
+        frame[np.unravel_index(idx, (height, width))] = pixels
     
-    # 2. Process Detections
-    current_threat = 0.0
-    detected_objects = len(boxes)
-    
-    for box in boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        cls = int(box.cls[0])
-        conf = float(box.conf[0])
-        label_name = model.names[cls]
-
-        # DECISION ENGINE: Determine Threat
-        # Person = High Threat, Car/Cell phone = Low Threat
-        box_color = HUD_COLOR
-        if label_name == 'person':
-            current_threat = 1.0
-            box_color = THREAT_COLOR
-        elif current_threat < 0.5:
-            current_threat = 0.2
-
-        # Draw "Bracket" style corners (Sick aesthetic)
-        l = 20 # Line length
-        t = 2  # Thickness
-        # Top-Left
-        cv2.line(frame, (x1, y1), (x1 + l, y1), box_color, t)
-        cv2.line(frame, (x1, y1), (x1, y1 + l), box_color, t)
-        # Bottom-Right
-        cv2.line(frame, (x2, y2), (x2 - l, y2), box_color, t)
-        cv2.line(frame, (x2, y2), (x2, y2 - l), box_color, t)
-
-        # Glitch Text
-        label = f"{label_name.upper()} [{conf:.2f}]"
-        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, box_color, 1)
+    # 2. Process Detections (all boxes -> NumPy in one transfer)
+    det = TrackedBoxes.from_boxes(boxes)
+    detected_objects = len(det)
+    xyxy = det.xyxy.astype(np.int32)
+    cls = det.cls.astype(np.int32)
+    is_person = np.isin(cls, person_class_ids(model.names))
+
+    # DECISION ENGINE: Determine Threat
+    # Person = High Threat, Car/Cell phone = Low Threat
+    current_threat = 1.0 if is_person.any() else (0.2 if detected_objects else 0.0)
+
+    # Draw "Bracket" style corners (Sick aesthetic), one polylines call per color
+    for mask, box_color in ((~is_person, HUD_COLOR), (is_person, THREAT_COLOR)):
+        if mask.any():
+            cv2.polylines(frame, list(bracket_polylines(xyxy[mask])), False,
+                          box_color, BRACKET_THICKNESS)
+
+    # Glitch Text
+    for (x1, y1), c, conf, person in zip(xyxy[:, :2].tolist(), cls.tolist(),
+                                         det.conf.tolist(), is_person.tolist()):
+        label = f"{model.names[c].upper()} [{conf:.2f}]"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    THREAT_COLOR if person else HUD_COLOR, 1)
 
     # 3. Update Audio Engine
     synth.update_state(current_threat, detected_objects)
 
     # 4. HUD Status Bar
     bar_width = int(width * 0.3)
-    # Background
-    cv2.rectangle(frame, (20, height - 40), (20 + bar_width, height - 20), (0, 50, 0), -1)
     # Threat Level Meter
     fill_width = int(bar_width * synth.threat_level)
     meter_color = (0, 255, 255) if synth.threat_level < 0.5 else (0, 0, 255)
@@ -142,73 +342,702 @@ def draw_hud(frame, boxes, synth):
     cv2.putText(frame, f"NEURAL_SYNC: {detected_objects} TARGETS", (20, height - 50), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 255, 200), 2)
 
+    # 5. Audio deadline telemetry (turns red when the synth is about to glitch)
+    if synth.stats.callbacks:
+        audio_color = THREAT_COLOR if synth.stats.at_risk else (200, 255, 200)
+        cv2.putText(frame, synth.stats.summary(), (20, height - 75),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, audio_color, 1)
+
+    return frame
+
+def draw_pipeline_stats(frame, stats):
+    # Per-stage latency/FPS readout, top-left corner
+    for i, stage in enumerate(stats):
+        cv2.putText(frame, stage.summary(), (10, 20 + i * 18),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 255, 200), 1)
     return frame
 
 # ==============================================================================
-# MAIN LOOP // BOOT SEQUENCE
+# PIPELINE STAGES
 # ==============================================================================
-print(">> SYSTEM INITIALIZING...")
-print(f">> LOAD_MODEL: {MODEL_TYPE}")
-# Load YOLOv8 Nano (optimized for CPU/Mobile)
-model = YOLO(MODEL_TYPE) 
+class FramePath:
+    """Frame buffers from capture to screen for one stream.
+
+    With `zero_copy`, the decoder and every resize write into FramePool
+    buffers (`cv2.resize(..., dst=...)`), so the steady state allocates no
+    pixel memory. With `hud_at_display`, the HUD is drawn on a display-size
+    resize of the captured frame with the boxes scaled up, instead of on
+    the 640x360 inference frame that then gets upscaled, so the text stays
+    sharp and a display-size capture needs no second resize at all.
+    """
 
-print(">> INIT_AUDIO_SYNTHESIS...")
-synth = CyberSynth()
+    def __init__(self, zero_copy=ZERO_COPY_RESIZE, hud_at_display=HUD_AT_DISPLAY_RES):
+        self.zero_copy = zero_copy
+        self.hud_at_display = hud_at_display
+        self.capture_pool = FramePool() if zero_copy else None
+        self.infer_pool = FramePool(INFER_SHAPE)
+        self.display_pool = FramePool((DISPLAY_SIZE[1], DISPLAY_SIZE[0], 3))
 
-print(f">> CONNECT_RTSP: {RTSP_URL}")
-cap = cv2.VideoCapture(RTSP_URL)
+    def read(self, cap):
+        return read_into(cap, self.capture_pool)
 
-# Buffer trick for RTSP latency
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    def resize(self, frame, pool):
+        if frame.shape == pool.shape:
+            return frame  # Capture already delivers this size
+        height, width = pool.shape[:2]
+        if not self.zero_copy:
+            return cv2.resize(frame, (width, height))
+        return cv2.resize(frame, (width, height), dst=pool.acquire())
+
+    def for_inference(self, frame):
+        # Optimization: Resize for Snapdragon inference speed
+        # 640x360 is a sweet spot for detection vs speed
+        return self.resize(frame, self.infer_pool)
+
+    def for_display(self, frame):
+        return self.resize(frame, self.display_pool)
+
+    def release(self, *frames):
+        """Hands pooled frames back once nothing will read them again (others are ignored)."""
+        for pool in (self.capture_pool, self.infer_pool, self.display_pool):
+            if pool is not None:
+                for frame in frames:
+                    pool.release(frame)
+
+    def release_packet(self, packet):
+        self.release(*packet.get('buffers', ()))
+
+    def infer_target(self, frame, frame_resized, boxes):
+        """hud_target() that releases the inference frame when the HUD is drawn elsewhere."""
+        frame_hud, boxes = self.hud_target(frame, frame_resized, boxes)
+        if frame_resized is not frame and frame_resized is not frame_hud:
+            self.release(frame_resized)
+        return frame_hud, boxes
+
+    def hud_target(self, frame, frame_resized, boxes):
+        """(frame to draw the HUD on, boxes in its coordinates)."""
+        if not self.hud_at_display:
+            return frame_resized, boxes
+        # A capture already at display size is drawn on directly; anything else is
+        # upscaled from the inference frame (cheaper than e.g. 1080p -> 720p)
+        display = frame if frame.shape == self.display_pool.shape else self.for_display(frame_resized)
+        return display, scale_boxes(boxes, frame_resized.shape, display.shape)
+
+    def report(self):
+        pools = {'capture': self.capture_pool, 'infer': self.infer_pool, 'display': self.display_pool}
+        return {
+            'zero_copy': self.zero_copy,
+            'hud_at_display': self.hud_at_display,
+            'buffer_allocations': {name: pool.allocations for name, pool in pools.items()
+                                   if pool is not None and self.zero_copy},
+        }
+
+def scale_boxes(boxes, src_shape, dst_shape):
+    det = TrackedBoxes.from_boxes(boxes)
+    sx, sy = dst_shape[1] / src_shape[1], dst_shape[0] / src_shape[0]
+    return TrackedBoxes(det.xyxy * np.array([sx, sy, sx, sy], np.float32), det.cls, det.conf)
+
+def resize_frame(frame):
+    return frame_path.for_inference(frame)
+
+def detect_batch(frames, schedulers, trackers):
+    """Detections for several frames with at most ONE model call.
+
+    Each frame has its own scheduler/tracker; frames that are due for a
+    fresh detection are stacked into a single batch.
+    """
+    boxes = [None] * len(frames)
+    pending = []
+    for i, frame in enumerate(frames):
+        if ADAPTIVE_INFERENCE:
+            schedulers[i].tick()
+            if not schedulers[i].should_detect(frame):
+                # Skip YOLO: slide the last detections forward
+                boxes[i] = trackers[i].predict()
+                continue
+        pending.append(i)
+
+    if pending:
+        # INFERENCE
+        results = model([frames[i] for i in pending], stream=True, verbose=False)
 
-if not cap.isOpened():
-    print("!! RTSP CONNECTION FAILED. FALLING BACK TO WEBCAM (0) !!")
-    cap = cv2.VideoCapture(0)
+        # Extract boxes (results come back in batch order)
+        for i, r in zip(pending, results):
+            boxes[i] = trackers[i].update(r.boxes) if ADAPTIVE_INFERENCE else r.boxes
+    return boxes
 
-frame_count = 0
-start_time = time.time()
+def detect(frame_resized):
+    return detect_batch([frame_resized], [scheduler], [tracker])[0]
 
-try:
+def infer_frame(frame):
+    frame_resized = resize_frame(frame)
+    return frame_path.infer_target(frame, frame_resized, detect(frame_resized))
+
+def open_capture(src):
+    """RTSP URL / video file / webcam index / directory of frames -> capture."""
+    if isinstance(src, str) and os.path.isdir(src):
+        cap = FrameDirectorySource(src)
+    else:
+        cap = cv2.VideoCapture(int(src) if str(src).isdigit() else src)
+        # Buffer trick for RTSP latency
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if args.capture_at_infer_res:
+            # Honoured by most webcams; files/RTSP ignore it and get resized as usual
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, INFER_SHAPE[1])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, INFER_SHAPE[0])
+    if args.drop_every:
+        cap = FlakyCapture(cap, args.drop_every)
+    return cap
+
+def reconnect(cap, src=None):
+    # Handle RTSP stream end/loop: rewind if the source can seek,
+    # otherwise the session is dead and has to be reopened
+    if cap.isOpened() and cap.set(cv2.CAP_PROP_POS_MSEC, 0):
+        return cap
+    cap.release()
+    return open_capture(source if src is None else src)
+
+def show(frame_hud, window='CYBER_SENTRY // RTSP', path=None):
+    # Scale up slightly for display if needed (no-op when the HUD is already display size)
+    path = path or frame_path
+    display_frame = path.for_display(frame_hud)
+    cv2.imshow(window, display_frame)  # Copies the pixels into the window
+    if display_frame is not frame_hud:
+        path.release(display_frame)
+
+    # Exit on 'Q'
+    return cv2.waitKey(1) & 0xFF == ord('q')
+
+def run_serial(cap):
+    """Original loop: capture -> infer -> draw -> display, one after another."""
     while True:
-        success, frame = cap.read()
+        success, frame = frame_path.read(cap)
         if not success:
-            # Handle RTSP stream end/loop
             print(">> STREAM LOST. RECONNECTING...")
-            cap.set(cv2.CAP_PROP_POS_MSEC, 0)
+            cap = reconnect(cap)
             continue
 
-        # Optimization: Resize for Snapdragon inference speed
-        # 640x360 is a sweet spot for detection vs speed
-        frame_resized = cv2.resize(frame, (640, 360))
+        frame_hud, boxes = infer_frame(frame)
 
-        # INFERENCE
-        results = model(frame_resized, stream=True, verbose=False)
+        # RENDER
+        frame_hud = draw_hud(frame_hud, boxes, synth)
+        quit_requested = show(frame_hud)
+        frame_path.release(frame, frame_hud)
+        first_frame_shown()
+        if quit_requested:
+            break
+    return cap
 
-        # Extract boxes
-        boxes = []
-        for r in results:
-            boxes = r.boxes
+def run_pipelined(cap):
+    """Capture, inference and display overlap; each hop keeps only the newest frame.
 
-        # RENDER
-        frame_hud = draw_hud(frame_resized, boxes, synth)
+    The capture thread reads continuously so the decoder never falls behind,
+    the inference thread always works on the freshest frame, and the main
+    thread (which owns the OpenCV window) draws the HUD on the freshest result.
+    """
+    frames_q = LatestQueue(maxsize=1, on_drop=frame_path.release_packet)
+    results_q = LatestQueue(maxsize=1, on_drop=frame_path.release_packet)
+    capture = CaptureThread(cap, frames_q, reconnect, pool=frame_path.capture_pool)
+    inference = InferenceThread(infer_frame, frames_q, results_q)
+    display_stats = StageStats('DISPLAY')
+    e2e_stats = StageStats('END2END')
+    stats = [capture.stats, inference.stats, display_stats, e2e_stats]
 
-        # Scale up slightly for display if needed
-        display_frame = cv2.resize(frame_hud, (1280, 720))
-        
-        cv2.imshow('CYBER_SENTRY // RTSP', display_frame)
+    capture.start()
+    inference.start()
+    last_report = time.perf_counter()
+    try:
+        while True:
+            for stage in (capture, inference):
+                if stage.error is not None:
+                    raise stage.error
 
-        # Exit on 'Q'
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            packet = results_q.get(timeout=0.1)
+            if packet is None:
+                # Nothing new yet: keep the window responsive
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+
+            t0 = time.perf_counter()
+            frame_hud = draw_hud(packet['frame'], packet['boxes'], synth)
+            draw_pipeline_stats(frame_hud, stats)
+            quit_requested = show(frame_hud)
+            frame_path.release_packet(packet)
+            first_frame_shown()
+            now = time.perf_counter()
+            display_stats.record(now - t0)
+            e2e_stats.record(now - packet['t_capture'])
+
+            if now - last_report > STATS_INTERVAL:
+                print(">> PIPELINE | " + " | ".join(s.summary() for s in stats) +
+                      f" | DROPPED cap={frames_q.dropped} inf={results_q.dropped}")
+                if ADAPTIVE_INFERENCE:
+                    print(">> " + scheduler.summary())
+                print(">> " + synth.stats.summary())
+                last_report = now
+            if quit_requested:
+                break
+    finally:
+        capture.stop()
+        inference.stop()
+        frames_q.close()
+        results_q.close()
+        capture.join(timeout=1.0)
+        inference.join(timeout=1.0)
+    return capture.cap
+
+def run_headless(cap, max_frames):
+    """Benchmark loop: no window, every stage timed. Returns (cap, report)."""
+    timer = StageTimer(trace_alloc=tracemalloc.is_tracing())
+    reconnects = 0
+    frames = 0
+
+    # Time the synth update on its own, separately from the HUD draw around it
+    update_state = synth.update_state
+    def timed_update(*a):
+        timer.time('synth_update', update_state, *a)
+    synth.update_state = timed_update
+
+    start = time.perf_counter()
+    try:
+        while frames < max_frames:
+            success, frame = timer.time('decode', frame_path.read, cap)
+            if not success:
+                reconnects += 1
+                print(">> STREAM LOST. RECONNECTING...")
+                cap = reconnect(cap)
+                continue
+
+            frame_resized = timer.time('resize', resize_frame, frame)
+            boxes = timer.time('inference', detect, frame_resized)
+            frame_hud, boxes = timer.time('hud_frame', frame_path.hud_target,
+                                          frame, frame_resized, boxes)
+            t0 = time.perf_counter()
+            draw_hud(frame_hud, boxes, synth)
+            timer.record('hud_draw', time.perf_counter() - t0 - timer.samples['synth_update'][-1])
+            # What show() would put on screen, minus the window itself
+            display = timer.time('display_resize', frame_path.for_display, frame_hud)
+            frame_path.release(frame, frame_resized, frame_hud, display)
+            first_frame_shown()
+            frames += 1
+    finally:
+        synth.update_state = update_state
+    wall = time.perf_counter() - start
+
+    report = {
+        'source': str(source),
+        'detector': 'stub' if args.stub_detector else MODEL_TYPE,
+        'isolated_detector': isinstance(model, RemoteDetector),
+        'adaptive_inference': ADAPTIVE_INFERENCE,
+        'frames': frames,
+        'reconnects': reconnects,
+        'wall_s': round(wall, 4),
+        'fps': round(frames / wall, 2) if wall > 0 else 0.0,
+        'stages': timer.summary(),
+        'frame_path': frame_path.report(),
+        'startup': dict(startup.marks),
+    }
+    if synth.stats.callbacks:
+        report['audio'] = synth.stats.snapshot()
+    if ADAPTIVE_INFERENCE:
+        report['detections'] = scheduler.detections
+        report['detect_interval'] = scheduler.interval
+    return cap, report
+
+# ==============================================================================
+# MULTI-STREAM // SHARED BATCHED INFERENCE
+# ==============================================================================
+class SentryStream:
+    """Everything one camera owns in multi-stream mode."""
+
+    def __init__(self, index, src, results_ready):
+        self.index = index
+        self.source = src
+        self.path = FramePath()
+        self.frames_q = LatestQueue(maxsize=1, on_drop=self.path.release_packet)
+        self.results_q = LatestQueue(maxsize=1, listener=results_ready,
+                                     on_drop=self.path.release_packet)
+        self.capture = CaptureThread(open_capture(src), self.frames_q, self.reconnect,
+                                     name=f'CAPTURE[{index}]', pool=self.path.capture_pool)
+        self.scheduler = make_scheduler()
+        self.tracker = BoxTracker()
+        self.synth = CyberSynth(start_stream=False)  # Voice on the shared SynthBus
+        self.display_stats = StageStats(f'DISPLAY[{index}]')
+        self.e2e_stats = StageStats(f'END2END[{index}]')
+        self.window = f'CYBER_SENTRY // CAM {index}'
+        self.frames = 0
+
+    def reconnect(self, cap):
+        return reconnect(cap, self.source)
+
+    def report(self):
+        return {
+            'source': str(self.source),
+            'frames': self.frames,
+            'capture_fps': round(self.capture.stats.fps, 2),
+            'display_fps': round(self.display_stats.fps, 2),
+            'end_to_end_ms': round(self.e2e_stats.latency_ms, 3),
+            'dropped_capture': self.frames_q.dropped,
+            'dropped_results': self.results_q.dropped,
+            'threat_level': round(self.synth.threat_level, 4),
+            'frame_path': self.path.report(),
+        }
+
+def run_multi(sources, headless=False, max_frames=None, loader=None):
+    """N cameras, one detector: frames are batched into a single model call.
+
+    Every stream keeps its own tracker, HUD, threat state and synth voice.
+    `MAX_BATCH_LATENCY` bounds how long a batch waits for slow cameras.
+    With a `loader`, the cameras connect while the model is still loading.
+    Returns a per-stream report dict.
+    """
+    results_ready = threading.Event()
+    streams = [SentryStream(i, src, results_ready) for i, src in enumerate(sources)]
+    startup.mark('capture_open_s')
+    if loader is not None:
+        try:
+            await_model(loader)
+        except BaseException:
+            for s in streams:
+                s.capture.cap.release()
+            raise
+
+    def infer_streams(packets):
+        owners = [streams[p['stream']] for p in packets]
+        frames = [s.path.for_inference(p['frame']) for s, p in zip(owners, packets)]
+        boxes = detect_batch(frames, [s.scheduler for s in owners], [s.tracker for s in owners])
+        for s, packet, frame, b in zip(owners, packets, frames, boxes):
+            packet['frame'], packet['boxes'] = s.path.infer_target(packet['frame'], frame, b)
+            packet['buffers'].append(packet['frame'])
+
+    batcher = BatchInferenceThread(infer_streams, [s.frames_q for s in streams],
+                                   [s.results_q for s in streams], args.max_batch_latency)
+    bus = SynthBus([s.synth for s in streams], start_stream=not headless or bool(args.audio_out),
+                   stream_factory=audio_stream_factory())
+    workers = [s.capture for s in streams] + [batcher]
+
+    for w in workers:
+        w.start()
+    start = last_report = time.perf_counter()
+    displayed = 0
+    try:
+        while max_frames is None or displayed < max_frames:
+            for w in workers:
+                if w.error is not None:
+                    raise w.error
+
+            results_ready.clear()
+            shown = False
+            for s in streams:
+                packet = s.results_q.get_nowait()
+                if packet is None:
+                    continue
+                t0 = time.perf_counter()
+                frame_hud = draw_hud(packet['frame'], packet['boxes'], s.synth)
+                if not headless:
+                    draw_pipeline_stats(frame_hud, [s.capture.stats, batcher.stats,
+                                                    s.display_stats, s.e2e_stats])
+                    show(frame_hud, s.window, s.path)
+                s.path.release_packet(packet)
+                first_frame_shown()
+                now = time.perf_counter()
+                s.display_stats.record(now - t0)
+                s.e2e_stats.record(now - packet['t_capture'])
+                s.frames += 1
+                displayed += 1
+                shown = True
+
+            if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            if not shown:
+                results_ready.wait(0.1)
+
+            now = time.perf_counter()
+            if now - last_report > STATS_INTERVAL:
+                print(f">> BATCH | {batcher.stats.summary()} | size {batcher.mean_batch_size:.2f}")
+                for s in streams:
+                    print(f">>   {s.capture.stats.summary()} | {s.e2e_stats.summary()}")
+                print(">> " + bus.stats.summary())
+                last_report = now
+    finally:
+        for w in workers:
+            w.stop()
+        for s in streams:
+            s.frames_q.close()
+            s.results_q.close()
+        for w in workers:
+            w.join(timeout=1.0)
+        if bus.stream is not None:
+            bus.stream.stop()
+            bus.stream.close()
+        for s in streams:
+            s.capture.cap.release()
+
+    wall = time.perf_counter() - start
+    report = {
+        'detector': 'stub' if args.stub_detector else MODEL_TYPE,
+        'streams': [s.report() for s in streams],
+        'frames': displayed,
+        'wall_s': round(wall, 4),
+        'fps': round(displayed / wall, 2) if wall > 0 else 0.0,
+        'batches': batcher.batches,
+        'mean_batch_size': round(batcher.mean_batch_size, 3),
+        'batch_latency_ms': round(batcher.stats.latency_ms, 3),
+        'max_batch_latency_s': args.max_batch_latency,
+        'startup': dict(startup.marks),
+    }
+    if bus.stats.callbacks:
+        report['audio'] = bus.stats.snapshot()
+    return report
+
+def audio_stream_factory():
+    """sounddevice by default; a file-backed fake device when --audio-out is given."""
+    if args.audio_out:
+        return lambda **kw: FileOutputStream(args.audio_out, **kw)
+    return None
+
+# ==============================================================================
+# MAIN LOOP // BOOT SEQUENCE
+# ==============================================================================
+def make_scheduler():
+    return AdaptiveScheduler(target_fps=TARGET_FPS, interval=DETECT_EVERY,
+                             max_interval=MAX_DETECT_EVERY, motion_threshold=MOTION_THRESHOLD)
+
+def load_model(isolated):
+    """YOLO (or the stub), either in this process or behind a RemoteDetector."""
+    if isolated:
+        if args.stub_detector:
+            spec = ('stub', {'latency': args.stub_latency, 'busy': args.stub_busy})
+        else:
+            spec = ('yolo', MODEL_TYPE)
+        print(f">> LOAD_MODEL: {spec[0].upper()} (ISOLATED PROCESS, SHARED-MEMORY FRAMES)")
+        return RemoteDetector(spec, n_slots=max(4, len(sources)))
+    if args.stub_detector:
+        print(">> LOAD_MODEL: STUB")
+        return StubDetector(latency=args.stub_latency, busy=args.stub_busy)
+    print(f">> LOAD_MODEL: {MODEL_TYPE}")
+    from ultralytics import YOLO  # Deferred: pulls in torch (seconds)
+    # Load YOLOv8 Nano (optimized for CPU/Mobile)
+    return YOLO(MODEL_TYPE)
+
+def warm_up(detector, batch=1, runs=WARMUP_RUNS):
+    """Dummy inferences so the first real frame doesn't pay for lazy init/allocation."""
+    frames = [np.zeros(INFER_SHAPE, np.uint8)] * batch
+    for _ in range(runs):
+        for _ in detector(frames, stream=True, verbose=False):
+            pass
+
+class ModelLoader(threading.Thread):
+    """Loads and warms up the detector in the background while the capture connects."""
+
+    def __init__(self, isolated, batch=1):
+        super().__init__(name='MODEL_LOADER', daemon=True)
+        self.isolated = isolated
+        self.batch = batch
+        self.model = None
+        self.error = None
+        self.load_s = 0.0
+        self.warmup_s = 0.0
+
+    def start(self):
+        if self.isolated:
+            # OpenCV's bootstrap briefly puts its own package first on sys.path
+            # (its `typing` shadows the stdlib one). A detector process spawned
+            # in that window inherits the edited path, so finish that import
+            # before spawning, not concurrently with the capture opening.
+            importlib.import_module('cv2')
+        super().start()
+
+    def run(self):
+        try:
+            t0 = time.perf_counter()
+            self.model = load_model(self.isolated)
+            t1 = time.perf_counter()
+            warm_up(self.model, self.batch)
+            self.load_s, self.warmup_s = t1 - t0, time.perf_counter() - t1
+        except Exception as e:  # Re-raised on the main thread by result()
+            self.error = e
+
+    def result(self):
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.model
+
+def await_model(loader):
+    """Blocks until the background load is done and installs the model."""
+    global model
+    model = loader.result()
+    startup.mark('model_ready_s')
+    startup.record('model_load_s', loader.load_s)
+    startup.record('warmup_s', loader.warmup_s)
+    return model
+
+def first_frame_shown():
+    if 'first_frame_s' not in startup.marks:
+        startup.mark('first_frame_s')
+        print(f">> TIME_TO_FIRST_FRAME: {startup.marks['first_frame_s']:.2f}s ({startup.summary()})")
+
+def shutdown(synth, cap, model):
+    # Cleanup
+    if synth.stream is not None:
+        synth.stream.stop()
+        synth.stream.close()
+    cap.release()
+    if isinstance(model, RemoteDetector):
+        model.close()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="CYBER_SENTRY // YOLO HUD + procedural audio")
+    parser.add_argument('--source', action='append', default=None,
+                        help="RTSP URL, video file, webcam index or directory of frames "
+                             "(repeat for multi-stream batched inference)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Benchmark mode: no window, no audio device, JSON stage timings")
+    parser.add_argument('--stub-detector', action='store_true',
+                        help="Use the deterministic StubDetector instead of YOLO")
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help="Simulated StubDetector inference time (seconds)")
+    parser.add_argument('--stub-busy', action='store_true',
+                        help="StubDetector burns its latency holding the GIL (CPU-bound inference)")
+    parser.add_argument('--max-frames', type=int, default=BENCH_FRAMES,
+                        help="Frames to process in --headless mode")
+    parser.add_argument('--json', default=None,
+                        help="Write the --headless report here instead of stdout")
+    parser.add_argument('--drop-every', type=int, default=0,
+                        help="Fake a dropped stream every N frames (exercises reconnect)")
+    parser.add_argument('--max-batch-latency', type=float, default=MAX_BATCH_LATENCY,
+                        help="Multi-stream: max seconds a batch waits for slower cameras")
+    parser.add_argument('--audio-out', default=None,
+                        help="Render the synth into this WAV through a fake realtime device "
+                             "(headless audio deadline/underrun telemetry)")
+    parser.add_argument('--isolate-detector', action='store_true',
+                        help="Run the detector in its own process (shared-memory frame ring)")
+    parser.add_argument('--compare-isolation', action='store_true',
+                        help="--headless: run the benchmark in-process AND isolated, report both")
+    parser.add_argument('--capture-at-infer-res', action='store_true', default=CAPTURE_AT_INFER_RES,
+                        help="Ask the capture backend for inference-size frames (skips the resize)")
+    parser.add_argument('--compare-resize', action='store_true',
+                        help="--headless: run the benchmark with the legacy resize path AND the "
+                             "zero-copy one, report both")
+    parser.add_argument('--trace-alloc', action='store_true',
+                        help="--headless: record bytes allocated per stage (tracemalloc; slows timings)")
+    return parser
+
+# Module state shared by the loops. Defaults keep the helpers usable after a
+# plain `import cyber_entry`; main() replaces them.
+args = build_parser().parse_args([])
+sources = [RTSP_URL]
+source = RTSP_URL
+model = None
+frame_path = FramePath()
+scheduler = None
+tracker = None
+synth = None
+startup = StartupClock(BOOT_T0)
+
+def run_comparison(variants):
+    """--headless A/B: the same workload once per (label, isolated, FramePath kwargs)."""
+    global startup, frame_path, scheduler, tracker, synth
+    reports = {}
+    for label, isolated, path_options in variants:
+        startup = StartupClock()
+        loader = ModelLoader(isolated)
+        loader.start()
+        frame_path = FramePath(**path_options)
+        scheduler, tracker = make_scheduler(), BoxTracker()
+        synth = CyberSynth(start_stream=bool(args.audio_out),
+                           stream_factory=audio_stream_factory())
+        cap = open_capture(source)
+        startup.mark('capture_open_s')
+        try:
+            await_model(loader)
+            cap, reports[label] = run_headless(cap, args.max_frames)
+        finally:
+            shutdown(synth, cap, loader.model)
+    return reports
+
+def main(argv=None):
+    global args, sources, source, frame_path, scheduler, tracker, synth
+    args = build_parser().parse_args(argv)
+    sources = args.source or [RTSP_URL]
+    source = sources[0]
+    if args.headless and args.trace_alloc:
+        tracemalloc.start()
+
+    print(">> SYSTEM INITIALIZING...")
+    if args.headless and (args.compare_isolation or args.compare_resize):
+        if args.compare_isolation:
+            # Same workload twice: throughput + audio jitter, in-process vs isolated
+            variants = [('single_process', False, {}), ('isolated_process', True, {})]
+        else:
+            # Fresh arrays + draw small/upscale vs recycled buffers + draw at display size
+            variants = [('legacy_resize', args.isolate_detector,
+                         {'zero_copy': False, 'hud_at_display': False}),
+                        ('zero_copy', args.isolate_detector,
+                         {'zero_copy': True, 'hud_at_display': True})]
+        write_report(run_comparison(variants), args.json)
+        print(">> SYSTEM SHUTDOWN.")
+        return
+
+    frame_path = FramePath()
+    # The model loads (and warms up) while the audio device and capture come up
+    loader = ModelLoader(args.isolate_detector, batch=len(sources))
+    loader.start()
+    scheduler = make_scheduler()
+    tracker = BoxTracker()
+
+    if len(sources) > 1:
+        print(f">> MULTI_STREAM: {len(sources)} SOURCES, BATCHED INFERENCE")
+        try:
+            report = run_multi(sources, args.headless, args.max_frames if args.headless else None,
+                               loader=loader)
+            if args.headless:
+                write_report(report, args.json)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Whatever ended the run, the detector process and its shared memory go too
+            loader.join()
+            if isinstance(loader.model, RemoteDetector):
+                loader.model.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        print(">> SYSTEM SHUTDOWN.")
+        return
+
+    print(">> INIT_AUDIO_SYNTHESIS...")
+    synth = CyberSynth(start_stream=not args.headless or bool(args.audio_out),
+                       stream_factory=audio_stream_factory())
+
+    print(f">> CONNECT: {source}")
+    cap = open_capture(source)
+
+    if not cap.isOpened() and not args.headless:
+        print("!! RTSP CONNECTION FAILED. FALLING BACK TO WEBCAM (0) !!")
+        source = 0
+        cap = open_capture(source)
+    startup.mark('capture_open_s')
 
-        frame_count += 1
+    try:
+        await_model(loader)
+        if args.headless:
+            cap, report = run_headless(cap, args.max_frames)
+            write_report(report, args.json)
+        elif PIPELINED:
+            cap = run_pipelined(cap)
+        else:
+            cap = run_serial(cap)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown(synth, cap, loader.model)
 
-except KeyboardInterrupt:
-    pass
+    if not args.headless:
+        cv2.destroyAllWindows()
+    print(">> SYSTEM SHUTDOWN.")
 
-# Cleanup
-synth.stream.stop()
-synth.stream.close()
-cap.release()
-cv2.destroyAllWindows()
-print(">> SYSTEM SHUTDOWN.")
\ No newline at end of file
+# Guarded: the isolated detector uses spawn, which re-imports this script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import abc
+import collections
+import threading
+import time
+import numpy as np
+
+# ==============================================================================
+# NEURAL BUS // THREADED STAGES FOR THE SENTRY LOOP
+# ==============================================================================
+# Capture -> Inference -> Display run as independent stages connected by
+# tiny drop-oldest queues. A slow stage never backs up the one before it:
+# stale frames are thrown away so the display always shows the freshest
+# result and end-to-end latency stays bounded.
+
+class LatestQueue:
+    """Bounded queue that drops the OLDEST item when full (never blocks put)."""
+
+    def __init__(self, maxsize=1, listener=None, on_drop=None):
+        self.items = collections.deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+        # Optional threading.Event shared by several queues ("something arrived")
+        self.listener = listener
+        # Optional callback for items thrown away unread (e.g. release their buffers)
+        self.on_drop = on_drop
+
+    def put(self, item):
+        dropped = None
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+                dropped = self.items[0]
+            self.items.append(item)
+            self.cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+        if self.listener is not None:
+            self.listener.set()
+
+    def get_nowait(self):
+        with self.cond:
+            return self.items.popleft() if self.items else None
+
+    def get(self, timeout=None):
+        """Returns the oldest queued item, or None on timeout / close."""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class FramePool:
+    """Recycled frame buffers for `dst=`-style OpenCV outputs.
+
+    Ownership is explicit: `acquire()` hands a buffer out and it stays busy
+    until someone calls `release(buf)`, so a frame is never overwritten
+    while a later stage is still drawing it. Packets carry the frames they
+    hold in 'buffers' and are released once displayed (or when a LatestQueue
+    drops them). Releasing a frame the pool does not own is a no-op, so a
+    stage can release everything it touched. New memory is allocated only
+    when every buffer is busy.
+    """
+
+    def __init__(self, shape=None, dtype=np.uint8, max_buffers=8):
+        self.shape = None if shape is None else tuple(shape)
+        self.dtype = dtype
+        self.max_buffers = max_buffers
+        self.buffers = []
+        self.busy = set()  # id() of handed-out buffers (all kept alive by self.buffers)
+        self.allocations = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """A free buffer (now busy), or None while the shape is still unknown."""
+        with self.lock:
+            for buf in self.buffers:
+                if id(buf) not in self.busy:
+                    self.busy.add(id(buf))
+                    return buf
+            if self.shape is None:
+                return None
+            buf = np.empty(self.shape, self.dtype)
+            self.allocations += 1
+            if len(self.buffers) < self.max_buffers:
+                self.buffers.append(buf)
+                self.busy.add(id(buf))
+            return buf
+
+    def release(self, buf):
+        """Returns a buffer from acquire()/adopt() to the pool (idempotent)."""
+        with self.lock:
+            if any(buf is b for b in self.buffers):
+                self.busy.discard(id(buf))
+
+    def adopt(self, frame):
+        """Keeps a frame some producer allocated itself (busy; learns the shape from it)."""
+        with self.lock:
+            if any(frame is buf for buf in self.buffers):
+                return
+            if frame.shape != self.shape:
+                self.shape = frame.shape
+                self.buffers = []
+                self.busy = set()
+            self.allocations += 1
+            if len(self.buffers) < self.max_buffers:
+                self.buffers.append(frame)
+                self.busy.add(id(frame))
+
+def read_into(cap, pool):
+    """cap.read() that decodes into a recycled FramePool buffer when it can."""
+    if pool is None:
+        return cap.read()
+    buf = pool.acquire()
+    success, frame = cap.read() if buf is None else cap.read(buf)
+    if buf is not None and not (success and frame is buf):
+        pool.release(buf)  # Failed read, or the decoder allocated a new frame
+    if success:
+        pool.adopt(frame)
+    return success, frame
+
+class StageStats:
+    """Per-stage latency (EMA, ms) and throughput (FPS over a sliding window)."""
+
+    def __init__(self, name, window=2.0, smoothing=0.1):
+        self.name = name
+        self.window = window
+        self.smoothing = smoothing
+        self.latency_ms = 0.0
+        self.count = 0
+        self.stamps = collections.deque()
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        now = time.perf_counter()
+        with self.lock:
+            ms = seconds * 1000.0
+            if self.count == 0:
+                self.latency_ms = ms
+            else:
+                self.latency_ms += self.smoothing * (ms - self.latency_ms)
+            self.count += 1
+            self.stamps.append(now)
+            while self.stamps and now - self.stamps[0] > self.window:
+                self.stamps.popleft()
+
+    @property
+    def fps(self):
+        with self.lock:
+            if len(self.stamps) < 2:
+                return 0.0
+            span = self.stamps[-1] - self.stamps[0]
+            return (len(self.stamps) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        return f"{self.name}: {self.latency_ms:6.1f}ms @ {self.fps:5.1f}fps"
+
+class StageThread(threading.Thread, metaclass=abc.ABCMeta):
+    """Runs `step()` in a loop until stopped. Subclasses implement `step()`."""
+
+    def __init__(self, name):
+        super().__init__(name=name, daemon=True)
+        self.stop_event = threading.Event()
+        self.stats = StageStats(name)
+        self.error = None
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                self.step()
+        except Exception as e:  # Surface worker crashes to the main thread
+            self.error = e
+            self.stop_event.set()
+
+    @abc.abstractmethod
+    def step(self):
+        """One unit of work; called repeatedly until the thread is stopped."""
+
+class CaptureThread(StageThread):
+    """Pulls frames as fast as the source delivers; only the freshest survives."""
+
+    def __init__(self, cap, out_queue, reconnect=None, name='CAPTURE', pool=None):
+        super().__init__(name)
+        self.cap = cap
+        self.out = out_queue
+        self.reconnect = reconnect
+        self.pool = pool  # Optional FramePool the decoder writes into
+        self.seq = 0
+
+    def step(self):
+        t0 = time.perf_counter()
+        success, frame = read_into(self.cap, self.pool)
+        t_capture = time.perf_counter()  # When the frame arrived, not when we started waiting
+        if not success:
+            print(">> STREAM LOST. RECONNECTING...")
+            if self.reconnect is not None:
+                self.cap = self.reconnect(self.cap)
+            else:
+                time.sleep(0.01)
+            return
+        self.stats.record(t_capture - t0)
+        self.seq += 1
+        # 'buffers': pooled frames this packet holds, released by whoever consumes it
+        self.out.put({'seq': self.seq, 'frame': frame, 't_capture': t_capture, 'buffers': [frame]})
+
+class InferenceThread(StageThread):
+    """Runs `infer(frame) -> (frame_resized, boxes)` on whatever frame is newest."""
+
+    def __init__(self, infer, in_queue, out_queue):
+        super().__init__('INFER')
+        self.infer = infer
+        self.inp = in_queue
+        self.out = out_queue
+
+    def step(self):
+        packet = self.inp.get(timeout=0.1)
+        if packet is None:
+            return
+        t0 = time.perf_counter()
+        packet['frame'], packet['boxes'] = self.infer(packet['frame'])
+        packet.setdefault('buffers', []).append(packet['frame'])
+        self.stats.record(time.perf_counter() - t0)
+        self.out.put(packet)
+
+class BatchInferenceThread(StageThread):
+    """Collects the newest frame from each stream into one batched detector call.
+
+    As soon as any stream has a frame, the batch is held open for at most
+    `max_batch_latency` seconds waiting for the others, then dispatched with
+    whatever arrived, so one slow camera never stalls the rest.
+    `infer_batch(packets)` gets the list of packets (each tagged with its
+    'stream' index) and fills in 'frame'/'boxes' on each.
+    """
+
+    def __init__(self, infer_batch, in_queues, out_queues, max_batch_latency=0.010):
+        super().__init__('BATCH')
+        self.infer_batch = infer_batch
+        self.inputs = in_queues
+        self.outputs = out_queues
+        self.max_batch_latency = max_batch_latency
+        self.ready = threading.Event()
+        for q in in_queues:
+            q.listener = self.ready
+        self.batches = 0
+        self.batched_frames = 0
+
+    def collect(self):
+        batch = {}
+        deadline = None
+        while True:
+            self.ready.clear()
+            for i, q in enumerate(self.inputs):
+                if i not in batch:
+                    packet = q.get_nowait()
+                    if packet is not None:
+                        packet['stream'] = i
+                        batch[i] = packet
+            if len(batch) == len(self.inputs) or self.stop_event.is_set():
+                break
+            now = time.perf_counter()
+            if batch and deadline is None:
+                deadline = now + self.max_batch_latency
+            timeout = 0.1 if deadline is None else deadline - now
+            if timeout <= 0:
+                break
+            self.ready.wait(timeout)
+        return [batch[i] for i in sorted(batch)]
+
+    def step(self):
+        packets = self.collect()
+        if not packets:
+            return
+        t0 = time.perf_counter()
+        self.infer_batch(packets)
+        self.stats.record(time.perf_counter() - t0)
+        self.batches += 1
+        self.batched_frames += len(packets)
+        for packet in packets:
+            self.outputs[packet['stream']].put(packet)
+
+    @property
+    def mean_batch_size(self):
+        return self.batched_frames / self.batches if self.batches else 0.0
@@ -0,0 +1,186 @@
+import time
+import numpy as np
+
+# ==============================================================================
+# PREFRONTAL CORTEX // ADAPTIVE INFERENCE SCHEDULING
+# ==============================================================================
+# YOLO is by far the most expensive stage, so it doesn't run on every frame.
+# It runs every N frames, or immediately when a cheap motion metric says the
+# scene changed. Between detections a constant-velocity tracker slides the
+# last boxes forward so the HUD and the synth keep getting smooth updates.
+# N is tuned on the fly to hold a target FPS.
+
+def to_numpy(values):
+    """Tensor (torch/ultralytics) or array-like -> NumPy array."""
+    if hasattr(values, 'cpu'):
+        values = values.cpu()
+    if hasattr(values, 'numpy'):
+        return values.numpy()
+    return np.asarray(values)
+
+class TrackedBoxes:
+    """Array-backed stand-in for ultralytics `Boxes` (xyxy / cls / conf).
+
+    Indexing and iteration return single-row TrackedBoxes, so code written as
+    `for box in boxes: box.xyxy[0], box.cls[0], box.conf[0]` works unchanged.
+    """
+
+    def __init__(self, xyxy=None, cls=None, conf=None):
+        self.xyxy = np.zeros((0, 4), np.float32) if xyxy is None else np.asarray(xyxy, np.float32).reshape(-1, 4)
+        self.cls = np.zeros(0, np.float32) if cls is None else np.asarray(cls, np.float32).ravel()
+        self.conf = np.zeros(0, np.float32) if conf is None else np.asarray(conf, np.float32).ravel()
+
+    @classmethod
+    def from_boxes(cls, boxes):
+        if isinstance(boxes, TrackedBoxes):
+            return boxes
+        if boxes is None or len(boxes) == 0:
+            return cls()
+        if hasattr(boxes, 'data'):
+            # ultralytics packs [x1, y1, x2, y2, (id,) conf, cls] per row:
+            # one device->host transfer instead of three
+            data = to_numpy(boxes.data)
+            return cls(data[:, :4], data[:, -1], data[:, -2])
+        return cls(to_numpy(boxes.xyxy), to_numpy(boxes.cls), to_numpy(boxes.conf))
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __getitem__(self, i):
+        sl = slice(i, i + 1) if isinstance(i, (int, np.integer)) else i
+        return TrackedBoxes(self.xyxy[sl], self.cls[sl], self.conf[sl])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N,4) and (M,4) xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+class BoxTracker:
+    """Constant-velocity box propagation between detector runs.
+
+    On each detection, new boxes are greedily matched (same class, best IoU)
+    to the previous detection to estimate a per-box velocity in px/frame.
+    Between detections the boxes are extrapolated and their confidence decays,
+    and boxes older than `max_age` frames are dropped.
+    """
+
+    def __init__(self, match_iou=0.3, conf_decay=0.97, max_age=30):
+        self.match_iou = match_iou
+        self.conf_decay = conf_decay
+        self.max_age = max_age
+        self.last = TrackedBoxes()
+        self.velocity = np.zeros((0, 4), np.float32)
+        self.age = 0
+
+    def update(self, boxes):
+        new = TrackedBoxes.from_boxes(boxes)
+        velocity = np.zeros_like(new.xyxy)
+        if len(self.last) and len(new):
+            iou = iou_matrix(new.xyxy, self.last.xyxy)
+            iou[new.cls[:, None] != self.last.cls[None, :]] = 0.0
+            for _ in range(min(len(new), len(self.last))):
+                i, j = np.unravel_index(np.argmax(iou), iou.shape)
+                if iou[i, j] < self.match_iou:
+                    break
+                # `age` predicted frames + this one since the previous detection
+                velocity[i] = (new.xyxy[i] - self.last.xyxy[j]) / (self.age + 1)
+                iou[i, :] = 0.0
+                iou[:, j] = 0.0
+        self.last = new
+        self.velocity = velocity
+        self.age = 0
+        return new
+
+    def predict(self):
+        self.age += 1
+        if self.age > self.max_age:
+            return TrackedBoxes()
+        return TrackedBoxes(self.last.xyxy + self.velocity * self.age,
+                            self.last.cls,
+                            self.last.conf * (self.conf_decay ** self.age))
+
+def motion_score(frame, reference):
+    """Mean absolute difference (0-255) between subsampled grayscale frames."""
+    if reference is None:
+        return float('inf')
+    return float(np.abs(frame.astype(np.int16) - reference.astype(np.int16)).mean())
+
+def motion_thumbnail(frame, step=8):
+    """Cheap grayscale thumbnail for motion_score (strided view, no resize)."""
+    small = frame[::step, ::step]
+    if small.ndim == 3:
+        small = small.mean(axis=2)
+    return small.astype(np.uint8)
+
+class AdaptiveScheduler:
+    """Decides per frame whether to run the detector.
+
+    Detection runs when `interval` frames have passed since the last one,
+    or when the motion score against the last detected frame exceeds
+    `motion_threshold`. `interval` is nudged up when the measured loop FPS
+    falls below `target_fps` and back down when there is headroom.
+    """
+
+    def __init__(self, target_fps=24.0, interval=3, min_interval=1, max_interval=10,
+                 motion_threshold=12.0, smoothing=0.1, clock=time.perf_counter):
+        self.target_fps = target_fps
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.smoothing = smoothing
+        self.clock = clock
+        self.since_detect = interval  # Force a detection on the first frame
+        self.reference = None
+        self.fps = 0.0
+        self.last_tick = None
+        self.detections = 0
+        self.frames = 0
+
+    def tick(self):
+        """Call once per frame: updates the smoothed loop FPS."""
+        now = self.clock()
+        if self.last_tick is not None and now > self.last_tick:
+            inst = 1.0 / (now - self.last_tick)
+            self.fps = inst if self.fps == 0.0 else self.fps + self.smoothing * (inst - self.fps)
+        self.last_tick = now
+
+    def retune(self):
+        # One step per detection so the interval can't run away between them
+        if self.fps == 0.0:
+            return
+        if self.fps < self.target_fps and self.interval < self.max_interval:
+            self.interval += 1
+        elif self.fps > self.target_fps * 1.25 and self.interval > self.min_interval:
+            self.interval -= 1
+
+    def should_detect(self, frame):
+        self.frames += 1
+        self.since_detect += 1
+        thumb = motion_thumbnail(frame)
+        due = self.since_detect >= self.interval
+        moved = self.reference is None or thumb.shape != self.reference.shape or \
+            motion_score(thumb, self.reference) > self.motion_threshold
+        if due or moved:
+            self.retune()
+            self.since_detect = 0
+            self.reference = thumb
+            self.detections += 1
+            return True
+        return False
+
+    def summary(self):
+        ratio = self.detections / self.frames if self.frames else 0.0
+        return f"SCHED: every {self.interval} | {self.fps:5.1f}fps | detect {ratio:4.0%}"
@@ -0,0 +1,164 @@
+import multiprocessing as mp
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from cyber_scheduler import TrackedBoxes
+
+# ==============================================================================
+# ISOLATED CORTEX // DETECTOR IN ITS OWN PROCESS
+# ==============================================================================
+# YOLO, OpenCV drawing and the audio callback all compete for one GIL in a
+# single process, so an inference spike stalls the synth. Here the detector
+# runs in a child process. Frames travel through a ring of shared-memory
+# slots (the parent copies pixels in, nothing is pickled) and only compact
+# (N, 6) float32 box arrays [x1, y1, x2, y2, conf, cls] come back.
+#
+# Keep this module free of side effects: spawn-based platforms import it in
+# the child to find `detector_main`.
+
+def build_detector(spec):
+    """('yolo', weights) or ('stub', kwargs) -> detector callable, built in the child."""
+    kind, arg = spec
+    if kind == 'stub':
+        from cyber_bench import StubDetector
+        return StubDetector(**arg)
+    from ultralytics import YOLO
+    return YOLO(arg)
+
+def pack_boxes(boxes):
+    det = TrackedBoxes.from_boxes(boxes)
+    return np.column_stack([det.xyxy, det.conf, det.cls]).astype(np.float32)
+
+def detector_main(spec, shm_name, slot_shape, n_slots, requests, responses):
+    """Child process loop: (call_id, [slots]) in -> (call_id, [box arrays]) out."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        ring = np.ndarray((n_slots,) + tuple(slot_shape), np.uint8, buffer=shm.buf)
+        try:
+            detector = build_detector(spec)
+        except Exception as e:
+            responses.put(('error', e))
+            return
+        responses.put(('ready', dict(detector.names)))
+        while True:
+            job = requests.get()
+            if job is None:
+                break
+            call_id, slots = job
+            try:
+                results = detector([ring[i] for i in slots], stream=True, verbose=False)
+                responses.put((call_id, [pack_boxes(r.boxes) for r in results]))
+            except Exception as e:  # Report, don't die: the parent decides
+                responses.put((call_id, e))
+        del ring
+    finally:
+        shm.close()
+
+class RemoteResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+class RemoteDetector:
+    """Parent-side proxy with the same call signature and `.names` as YOLO.
+
+    `model(frames)` copies each frame into the next free ring slot, posts
+    one request for the whole batch and blocks (GIL released) until the
+    boxes come back. Frames must all have `slot_shape`. The slots of a call
+    that timed out stay reserved until the child answers it: it may still
+    be reading them.
+    """
+
+    def __init__(self, spec, slot_shape=(360, 640, 3), n_slots=4, timeout=30.0):
+        self.slot_shape = tuple(slot_shape)
+        self.n_slots = n_slots
+        self.timeout = timeout
+        self.next_slot = 0
+        self.busy = {}  # Timed-out call_id -> ring slots the child may still be reading
+        self.calls = 0
+        slot_bytes = int(np.prod(self.slot_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_bytes * n_slots)
+        self.ring = np.ndarray((n_slots,) + self.slot_shape, np.uint8, buffer=self.shm.buf)
+        ctx = mp.get_context('spawn')  # No fork of a process holding cv2/audio threads
+        self.requests = ctx.Queue()
+        self.responses = ctx.Queue()
+        self.process = ctx.Process(target=detector_main, name='DETECTOR',
+                                   args=(spec, self.shm.name, self.slot_shape, n_slots,
+                                         self.requests, self.responses),
+                                   daemon=True)
+        self.process.start()
+        deadline = time.monotonic() + max(timeout, 120.0)  # Model load
+        while True:
+            try:
+                tag, payload = self.responses.get(timeout=0.5)
+                break
+            except queue.Empty:
+                # A child that dies while booting never reports: don't wait it out
+                exitcode = self.process.exitcode
+                if exitcode is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError("Detector process failed to start" +
+                                       (f" (exit code {exitcode})" if exitcode is not None else "")) from None
+        if tag == 'error':
+            self.close()
+            raise payload
+        self.names = payload
+
+    def __call__(self, source, stream=False, verbose=False, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        if len(frames) > self.n_slots:
+            raise ValueError(f"Batch of {len(frames)} frames exceeds {self.n_slots} ring slots")
+        for frame in frames:
+            if frame.shape != self.slot_shape:
+                raise ValueError(f"Frame shape {frame.shape} != ring slot shape {self.slot_shape}")
+        self.collect_late()
+        held = {slot for slots in self.busy.values() for slot in slots}
+        free = [slot for slot in ((self.next_slot + i) % self.n_slots for i in range(self.n_slots))
+                if slot not in held]
+        if len(frames) > len(free):
+            raise RuntimeError(f"Detector process still holds {len(held)} ring slots "
+                               "of a timed-out batch")
+        slots = free[:len(frames)]
+        for slot, frame in zip(slots, frames):
+            np.copyto(self.ring[slot], frame)
+        if slots:
+            self.next_slot = (slots[-1] + 1) % self.n_slots
+
+        self.calls += 1
+        call_id = self.calls
+        self.requests.put((call_id, slots))
+        while True:
+            try:
+                got_id, payload = self.responses.get(timeout=self.timeout)
+            except queue.Empty:
+                self.busy[call_id] = slots  # Not ours to overwrite until the child answers
+                raise RuntimeError("Detector process timed out") from None
+            self.busy.pop(got_id, None)  # A late answer frees its slots
+            if got_id == call_id:
+                break
+        if isinstance(payload, Exception):
+            raise payload
+
+        results = [RemoteResult(TrackedBoxes(a[:, :4], a[:, 5], a[:, 4])) for a in payload]
+        return iter(results) if stream else results
+
+    def collect_late(self):
+        """Frees the slots of timed-out calls the child has answered since."""
+        while self.busy:
+            try:
+                got_id, _ = self.responses.get_nowait()
+            except queue.Empty:
+                return
+            self.busy.pop(got_id, None)
+
+    def close(self):
+        if self.process is None:
+            return
+        self.requests.put(None)
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        self.ring = None
+        self.shm.close()
+        self.shm.unlink()
@@ -1,7 +1,11 @@
 import math
 import random
-import struct
-import wave
+import time
+import numpy as np
+import cabinet
+import dsp_kernels
+import oversample
+import pcm_encoder
 
 # =============================================================================
 # 1. THE HYPER-CONFIG
@@ -10,7 +14,14 @@ CONFIG = {
     'SR': 44100,
     'BPM': 190,              # Blistering Speed
     'GAIN': 150.0,           # Absurd Gain
+    'OVERSAMPLE': 4,         # Clipper oversampling: 1 (off) | 2 | 4 | 8
     'MASTER': 0.7,
+    'CAB_HZ': 4000,          # Speaker roll-off
+    'CAB_IR': '4x12_closed', # cabinet.CABINETS name (None = one-pole lowpass)
+    'CAB_BLOCK': 256,        # Convolution block: latency vs throughput
+    'WAV_FORMAT': 'int16',   # 'int16' | 'int24' | 'float32'
+    'DITHER': False,         # TPDF dither on integer formats
+    'DITHER_SEED': None,     # Dither noise seed (None = fresh noise every render)
     'SCALES': {
         # The "Yngwie" Scale (Harmonic Minor)
         'harmonic_minor': [0, 2, 3, 5, 7, 8, 11, 12],
@@ -24,17 +35,46 @@ CONFIG = {
 # =============================================================================
 # 2. DSP PHYSICS ( The "Tone" )
 # =============================================================================
+def pre_eq_loop(x, gain, state):
+    """Pre-distortion EQ: hpf = x - 0.85 * state, state = the one-pole cab output.
+
+    The EQ subtracts the previous output of the original one-pole cabinet
+    (0.2 * clipped + 0.8 * hpf), so the clipper sits inside its loop. The
+    clip here is the plain one; the oversampled clipper and IR cabinet that
+    make the audible signal do not change how the EQ behaves.
+    """
+    hpf = np.empty(len(x))
+    for n in range(len(x)):
+        h = x[n] - state * 0.85
+        boosted = h * gain
+        if boosted > 0:
+            clipped = math.tanh(boosted)
+        else:
+            clipped = math.tanh(boosted * 1.2) / 1.2
+        state = clipped * 0.2 + h * 0.8
+        hpf[n] = h
+    return hpf, state
+
+pre_eq = dsp_kernels.jit(pre_eq_loop, np.zeros(4), 1.0, 0.0)
+
 class ShredDSP:
     def __init__(self):
         self.delay_buf = [0.0] * int(0.4 * CONFIG['SR']) # 400ms buffer
         self.d_idx = 0
-        self.last_sample = 0.0
+        self.last_sample = 0.0  # One-pole cab output (the pre-EQ feeds it back)
+
+        # Anti-aliased clipper (runs at OVERSAMPLE x the rate, see oversample.py)
+        self.clipper = oversample.build_oversampler(oversample.asymmetric_shaper(1.2),
+                                                    CONFIG['OVERSAMPLE'])
+
+        # Speaker Cabinet (Impulse Response convolution, see cabinet.py)
+        self.cab = cabinet.build_cabinet(CONFIG['CAB_IR'], CONFIG['SR'], CONFIG['CAB_BLOCK'],
+                                         cutoff=CONFIG['CAB_HZ'])
 
     def process(self, raw_signal):
         # 1. PRE-DISTORTION EQ (Tighten bass)
         # High-pass filter at 300Hz to remove mud
         hpf = raw_signal - (self.last_sample * 0.85)
-        self.last_sample = hpf
 
         # 2. GAIN STAGING
         # Boost
@@ -43,15 +83,22 @@ class ShredDSP:
         # 3. WAVE SHAPING (The Distortion)
         # Asymmetrical Soft Clipping (Tube-like)
         if boosted > 0:
-            distorted = math.tanh(boosted) 
+            clipped = math.tanh(boosted) 
         else:
             # Diode clipping symmetry simulation
-            distorted = math.tanh(boosted * 1.2) / 1.2
+            clipped = math.tanh(boosted * 1.2) / 1.2
+        distorted = self.clipper.process(boosted) if self.clipper is not None else clipped
 
         # 4. CABINET SIMULATION (Low Pass @ 4kHz)
-        # Simple IIR Filter
-        cab_out = distorted * 0.2 + self.last_sample * 0.8
-        self.last_sample = cab_out
+        # Simple IIR Filter; it always runs, the pre-EQ feeds back its output
+        one_pole = clipped * 0.2 + hpf * 0.8
+        self.last_sample = one_pole
+        if self.cab is not None:
+            cab_out = self.cab.process(distorted)
+        elif self.clipper is not None:
+            cab_out = distorted * 0.2 + hpf * 0.8
+        else:
+            cab_out = one_pole
 
         # 5. STEREO DELAY (Ping Pong Simulation - Mono downmix for WAV)
         delayed = self.delay_buf[self.d_idx]
@@ -62,6 +109,25 @@ class ShredDSP:
         # Mix Dry + Wet
         return (cab_out * 0.7) + (delayed * 0.3)
 
+    def process_array(self, raw_signal):
+        """process() over a whole block; the recurrences run in dsp_kernels."""
+        raw_signal = np.asarray(raw_signal, dtype=np.float64)
+        hpf, self.last_sample = pre_eq(raw_signal, CONFIG['GAIN'], self.last_sample)
+        boosted = hpf * CONFIG['GAIN']
+        if self.clipper is not None:
+            distorted = self.clipper.process_array(boosted)
+        else:
+            distorted = oversample.asymmetric_shaper(1.2)(boosted)
+        if self.cab is not None:
+            cab_out = self.cab.process_array(distorted)
+        else:
+            cab_out = distorted * 0.2 + hpf * 0.8
+
+        delay = np.array(self.delay_buf)
+        delayed, self.d_idx = dsp_kernels.feedback_delay(cab_out, delay, self.d_idx, 0.4)
+        self.delay_buf = delay.tolist()
+        return (cab_out * 0.7) + (delayed * 0.3)
+
 def osc(freq, t, type='saw'):
     """High-aliasing oscillators for raw metal texture"""
     if freq <= 0: return 0.0
@@ -208,7 +274,7 @@ class Virtuoso:
 # =============================================================================
 # 4. MAIN EXECUTION
 # =============================================================================
-if __name__ == "__main__":
+def main():
     print(f"IGNITING DRAGONFIRE ENGINE @ {CONFIG['BPM']} BPM...")
     
     # 1. Compose
@@ -217,24 +283,24 @@ if __name__ == "__main__":
     
     # 2. Process DSP
     dsp = ShredDSP()
-    final_audio = []
     
     print(f"Processing {len(v.samples)} samples through Tube Simulation...")
     
-    for s in v.samples:
-        processed = dsp.process(s)
-        # Limiter to prevent wrap-around clipping
-        processed = max(-1.0, min(1.0, processed * CONFIG['MASTER']))
-        final_audio.append(processed)
+    dsp_kernels.warm_up()  # JIT compile / disk-cache load stays out of the timing
+    t0 = time.perf_counter()
+    processed = dsp.process_array(v.samples)
+    dsp_seconds = time.perf_counter() - t0
+    print(f"Amp DSP: {len(v.samples) / CONFIG['SR'] / dsp_seconds:.1f}x realtime ({dsp_kernels.BACKEND} kernels)")
+    # Limiter to prevent wrap-around clipping
+    final_audio = np.clip(processed * CONFIG['MASTER'], -1.0, 1.0)
         
     # 3. Write
     print("Writing 'high_iq_solo.wav'...")
-    with wave.open('high_iq_solo.wav', 'w') as f:
-        f.setnchannels(1)
-        f.setsampwidth(2)
-        f.setframerate(CONFIG['SR'])
-        # Convert float to int16
-        data = struct.pack('<' + ('h'*len(final_audio)), *[int(s * 32767) for s in final_audio])
-        f.writeframes(data)
+    pcm_encoder.write_wav('high_iq_solo.wav', final_audio, CONFIG['SR'],
+                          fmt=CONFIG['WAV_FORMAT'], dither=CONFIG['DITHER'],
+                          seed=CONFIG['DITHER_SEED'])
         
-    print("DONE. Prepare your ears.")
\ No newline at end of file
+    print("DONE. Prepare your ears.")
+
+if __name__ == "__main__":
+    main()
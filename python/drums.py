@@ -0,0 +1,196 @@
+import math
+import sys
+import time
+import zlib
+import numpy as np
+
+# =============================================================================
+# DRUMS // ONE-SHOT SAMPLE BANK + OVERLAP-ADD SEQUENCER
+# =============================================================================
+# The voices of the String Engine reference (whatami/, "PERCUSSION
+# SYNTHESIS"): pitch-swept kick, noise + body snare, high-passed noise hat
+# and the sine + filtered square 808. A drum hit is the same waveform every
+# time it is played with the same parameters, so each voice is synthesized
+# ONCE per parameter set into a cached one-shot buffer:
+#
+#   SampleBank.get('kick')            -> synthesized on first use, then reused
+#   DrumSequencer.add(t, 'kick', 0.8) -> hit scheduled at sample round(t * sr)
+#   DrumSequencer.render(n)           -> out[pos:pos + len(buf)] += gain * buf
+#
+# so a song with hundreds of hits costs a handful of syntheses plus one
+# slice-add per hit. The result is an extra dry track for the engine mixdown.
+
+# Voice defaults (WebAudio reference values; seconds, Hz, linear gain)
+VOICES = {
+    'kick':    {'f_start': 180.0, 'f_end': 50.0, 'sweep': 0.1, 'decay': 0.3},
+    'snare':   {'noise_hp': 2000.0, 'noise_gain': 0.6, 'body_start': 250.0, 'body_end': 150.0,
+                'body_gain': 0.4, 'decay': 0.1},
+    'hat':     {'hp': 10000.0, 'gain': 0.3, 'decay': 0.03, 'length': 0.05},
+    'bass808': {'freq': 41.2, 'duration': 0.5, 'square_lp': 400.0, 'square_gain': 0.2},
+}
+
+# Step patterns, one string per voice per bar: 'X' accent, 'x' hit, '.' rest.
+# Steps are spread evenly over the bar (16 = straight 16ths, 12 = triplet 8ths).
+GROOVES = {
+    'rock':          {'kick':  'X.....x.X.x.....',
+                      'snare': '....X.......X...',
+                      'hat':   'x.x.x.x.x.x.x.x.'},
+    'blues_shuffle': {'kick':  'X.....x.....',
+                      'snare': '...X.....X..',
+                      'hat':   'x.xx.xx.xx.x'},
+    'hats':          {'hat':   'x.x.x.x.x.x.x.x.'},
+}
+ACCENTS = {'X': 1.0, 'x': 0.7}
+
+SILENCE = 0.001  # Level the exponential decays reach (-60 dB)
+
+# -----------------------------------------------------------------------------
+# Synthesis (runs once per voice and parameter set)
+# -----------------------------------------------------------------------------
+def exp_ramp(v0, v1, duration, n, sr):
+    """WebAudio exponentialRampToValueAtTime from t=0, held at v1 afterwards."""
+    t = np.minimum(np.arange(n) / sr, duration)
+    return v0 * (v1 / v0) ** (t / duration)
+
+def sweep_osc(freq, sr):
+    """Sine with a per-sample frequency curve (phase is the running sum)."""
+    return np.sin(2 * math.pi * np.cumsum(freq) / sr)
+
+def biquad(x, kind, freq, sr, q=0.7071):
+    """RBJ cookbook 'lowpass' / 'highpass' biquad (WebAudio BiquadFilterNode)."""
+    w = 2 * math.pi * freq / sr
+    alpha = math.sin(w) / (2 * q)
+    cos_w = math.cos(w)
+    if kind == 'lowpass':
+        b = [(1 - cos_w) / 2, 1 - cos_w, (1 - cos_w) / 2]
+    else:
+        b = [(1 + cos_w) / 2, -(1 + cos_w), (1 + cos_w) / 2]
+    a0 = 1 + alpha
+    b0, b1, b2 = b[0] / a0, b[1] / a0, b[2] / a0
+    a1, a2 = -2 * cos_w / a0, (1 - alpha) / a0
+    y = []
+    x1 = x2 = y1 = y2 = 0.0
+    for s in x.tolist():
+        out = b0 * s + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x1, x2, y1, y2 = s, x1, out, y1
+        y.append(out)
+    return np.array(y)
+
+def synth_kick(sr, rng, f_start, f_end, sweep, decay):
+    n = int(decay * sr)
+    return sweep_osc(exp_ramp(f_start, f_end, sweep, n, sr), sr) * exp_ramp(1.0, SILENCE, decay, n, sr)
+
+def synth_snare(sr, rng, noise_hp, noise_gain, body_start, body_end, body_gain, decay):
+    n = int(decay * sr)
+    env = exp_ramp(1.0, SILENCE, decay, n, sr)
+    noise = biquad(rng.uniform(-1.0, 1.0, n), 'highpass', noise_hp, sr) * noise_gain
+    body = sweep_osc(exp_ramp(body_start, body_end, decay, n, sr), sr) * body_gain
+    return (noise + body) * env
+
+def synth_hat(sr, rng, hp, gain, decay, length):
+    n = int(length * sr)
+    return biquad(rng.uniform(-1.0, 1.0, n), 'highpass', hp, sr) * exp_ramp(gain, SILENCE * gain, decay, n, sr)
+
+def synth_bass808(sr, rng, freq, duration, square_lp, square_gain):
+    n = int(duration * sr)
+    t = np.arange(n) / sr
+    square = np.where(np.sin(2 * math.pi * freq * t) >= 0, 1.0, -1.0)
+    tone = np.sin(2 * math.pi * freq * t) + square_gain * biquad(square, 'lowpass', square_lp, sr)
+    # Linear 10 ms attack to 0.8, hold, linear 50 ms release
+    env = 0.8 * np.minimum(1.0, np.minimum(t / 0.01, np.maximum(0.0, duration - t) / 0.05))
+    return tone * env
+
+SYNTHS = {'kick': synth_kick, 'snare': synth_snare, 'hat': synth_hat, 'bass808': synth_bass808}
+
+class SampleBank:
+    """One-shot buffers, synthesized on first request per (voice, parameters)."""
+
+    def __init__(self, sr=44100, seed=0):
+        self.sr = sr
+        self.seed = seed
+        self.samples = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, voice, **params):
+        spec = dict(VOICES[voice])
+        unknown = set(params) - set(spec)
+        if unknown:
+            raise ValueError(f"unknown {voice} parameters: {sorted(unknown)}")
+        spec.update({k: float(v) for k, v in params.items()})
+        key = (voice, tuple(sorted(spec.items())))
+        buf = self.samples.get(key)
+        if buf is not None:
+            self.hits += 1
+            return buf
+        self.misses += 1
+        # Noise is seeded per parameter set, so a render never depends on request order
+        rng = np.random.default_rng([self.seed, zlib.crc32(repr(key).encode())])
+        buf = SYNTHS[voice](self.sr, rng, **spec)
+        buf.flags.writeable = False
+        self.samples[key] = buf
+        return buf
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.samples.values())
+
+class DrumSequencer:
+    """Schedules one-shots on a beat grid and mixes them by overlap-add."""
+
+    def __init__(self, bank, bpm, beats_per_bar=4):
+        self.bank = bank
+        self.sr = bank.sr
+        self.beat_sec = 60.0 / bpm
+        self.bar_sec = self.beat_sec * beats_per_bar
+        self.events = []  # (sample position, gain, buffer)
+
+    def add(self, t, voice, gain=1.0, **params):
+        """One hit at t seconds."""
+        self.events.append((int(round(t * self.sr)), gain, self.bank.get(voice, **params)))
+
+    def add_groove(self, name, first_bar, n_bars):
+        """GROOVES[name] on bars [first_bar, first_bar + n_bars)."""
+        for voice, steps in GROOVES[name].items():
+            step_sec = self.bar_sec / len(steps)
+            for bar in range(first_bar, first_bar + n_bars):
+                for i, c in enumerate(steps):
+                    if c in ACCENTS:
+                        self.add(bar * self.bar_sec + i * step_sec, voice, ACCENTS[c])
+
+    def render(self, n_samples):
+        """The drum track: every hit summed in, cut at n_samples."""
+        out = np.zeros(n_samples)
+        for pos, gain, buf in self.events:
+            n = min(len(buf), n_samples - pos)
+            if n > 0:
+                out[pos:pos + n] += gain * buf[:n]
+        return out
+
+# =============================================================================
+# BENCHMARK: python drums.py [groove] [bars]
+# =============================================================================
+def benchmark(groove='rock', bars=64, bpm=120, sr=44100):
+    seq = DrumSequencer(SampleBank(sr), bpm)
+    n = int(bars * seq.bar_sec * sr)
+    seconds = n / sr
+    t0 = time.perf_counter()
+    seq.add_groove(groove, 0, bars)
+    track = seq.render(n)
+    render_s = time.perf_counter() - t0
+    print(f"groove: {groove} | {bars} bars @ {bpm} BPM ({seconds:.0f}s) | {len(seq.events)} hits")
+    print(f"bank:               {seq.bank.misses} syntheses, {seq.bank.hits} reuses, {seq.bank.nbytes / 1024:.0f} KiB")
+    print(f"bank + overlap-add: {seconds / render_s:10.1f}x realtime | peak {np.abs(track).max():.2f}")
+    # Reference: synthesizing every hit (one bar's worth, scaled to the song)
+    ref = SampleBank(sr)
+    t0 = time.perf_counter()
+    for voice, steps in GROOVES[groove].items():
+        for _ in range(sum(c in ACCENTS for c in steps)):
+            ref.samples.clear()
+            ref.get(voice)
+    per_hit_s = (time.perf_counter() - t0) * bars
+    print(f"per-hit synthesis:  {seconds / per_hit_s:10.1f}x realtime")
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else 'rock',
+              int(sys.argv[2]) if len(sys.argv) > 2 else 64)
@@ -0,0 +1,188 @@
+import math
+import os
+import sys
+import time
+import numpy as np
+
+# =============================================================================
+# RECURRENCE KERNELS // OPTIONAL NUMBA JIT
+# =============================================================================
+# One-pole filters and feedback delays are recurrences: every output needs
+# the previous one, so NumPy cannot evaluate them as one array expression.
+# These kernels run them over whole blocks instead of one Python call per
+# sample. With Numba installed the loops are compiled to machine code and
+# cached on disk (next to this file in __pycache__, or in NUMBA_CACHE_DIR),
+# so only the first run ever pays the compile. Without it both recurrences
+# use exact NumPy forms (chunked closed form / in-place ring slices).
+#
+# Kernels take float64 arrays and plain floats/ints; state goes in and comes
+# back out, so callers keep it between blocks.
+#
+#   DSP_BACKEND=python   force the fallback even when Numba is installed
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+DENORMAL = 1e-30  # Decaying filter states are flushed to 0 below this (subnormals are ~10x slower)
+
+BACKEND = 'numba' if numba is not None and os.environ.get('DSP_BACKEND') != 'python' else 'python'
+
+def one_pole_loop(x, b0, a1, y1):
+    """y[n] = b0 * x[n] + a1 * y[n-1], starting from y[-1] = y1 -> (y, last y)."""
+    y = np.empty_like(x)
+    for n in range(len(x)):
+        y1 = b0 * x[n] + a1 * y1
+        if -DENORMAL < y1 < DENORMAL:
+            y1 = 0.0
+        y[n] = y1
+    return y, y1
+
+def one_pole_numpy(x, b0, a1, y1, max_chunk=4096):
+    """Same result as one_pole_loop, in closed form one chunk at a time.
+
+    Within a chunk y[n] = a1^(n+1) * y1 + b0 * a1^n * sum_k<=n x[k] * a1^-k:
+    a cumulative sum instead of a loop. The chunk is kept short enough that
+    |a1|^-n stays below 1e100, so the powers never overflow and the sum
+    keeps full precision at the scale of the output.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.empty_like(x)
+    if a1 == 0.0 or not len(x):
+        y[:] = b0 * x
+        return y, (float(y[-1]) if len(x) else y1)
+    if abs(a1) >= 1.0:
+        return one_pole_loop(x, b0, a1, y1)  # Unstable/integrator: no closed form worth the risk
+    chunk = int(min(max_chunk, max(1, 100.0 / -math.log10(abs(a1)))))
+    k = np.arange(chunk)
+    up = a1 ** (k + 1)  # a1^(n+1)
+    down = a1 ** -k     # a1^-k
+    for start in range(0, len(x), chunk):
+        n = min(chunk, len(x) - start)
+        seg = y[start:start + n]
+        np.cumsum(x[start:start + n] * down[:n], out=seg)
+        seg *= b0 * up[:n] / a1
+        seg += up[:n] * y1
+        y1 = float(seg[-1])
+    y[np.abs(y) < DENORMAL] = 0.0
+    return y, (0.0 if -DENORMAL < y1 < DENORMAL else y1)
+
+def feedback_delay_loop(x, buf, idx, feedback):
+    """Circular delay line: out = buf[idx]; buf[idx] = x + feedback * out -> (outs, idx)."""
+    out = np.empty_like(x)
+    size = len(buf)
+    for n in range(len(x)):
+        d = buf[idx]
+        out[n] = d
+        buf[idx] = x[n] + feedback * d
+        idx += 1
+        if idx == size:
+            idx = 0
+    return out, idx
+
+def feedback_delay_numpy(x, buf, idx, feedback):
+    """Same result as feedback_delay_loop, vectorized one run of the ring at a time.
+
+    A sample written now is read back exactly len(buf) samples later, so
+    within any stretch of at most len(buf) samples no output depends on
+    another. Each step handles buf[idx:] (or less) in place: read it out,
+    write input + feedback back, wrap the index.
+    """
+    size = len(buf)
+    out = np.empty_like(x)
+    start = 0
+    while start < len(x):
+        n = min(len(x) - start, size - idx)
+        d = buf[idx:idx + n]
+        out[start:start + n] = d
+        d *= feedback
+        d += x[start:start + n]
+        start += n
+        idx += n
+        if idx == size:
+            idx = 0
+    return out, idx
+
+if BACKEND == 'numba':
+    one_pole = numba.njit(cache=True)(one_pole_loop)
+    feedback_delay = numba.njit(cache=True)(feedback_delay_loop)
+else:
+    one_pole = one_pole_numpy
+    feedback_delay = feedback_delay_numpy
+
+WARM_UP = []  # (kernel, sample args) registered by jit()
+
+def jit(loop, *warm_args):
+    """Engine-specific per-sample kernel: Numba-compiled, or `loop` run on a list.
+
+    `loop(x, ...)` may only index and take len() of `x`: the fallback hands it
+    x.tolist(), since list indexing is several times faster than NumPy scalar
+    indexing in the interpreter. `warm_args` (x included) let warm_up()
+    compile it ahead of the timed run.
+    """
+    if BACKEND == 'numba':
+        kernel = numba.njit(cache=True)(loop)
+    else:
+        def kernel(x, *args):
+            return loop(np.asarray(x, dtype=np.float64).tolist(), *args)
+    if warm_args:
+        WARM_UP.append((kernel, warm_args))
+    return kernel
+
+def warm_up():
+    """Compiles (or loads from the disk cache) every kernel; returns seconds spent."""
+    t0 = time.perf_counter()
+    x = np.zeros(4)
+    one_pole(x, 0.5, 0.5, 0.0)
+    feedback_delay(x, np.zeros(2), 0, 0.5)
+    for kernel, args in WARM_UP:
+        kernel(*args)
+    return time.perf_counter() - t0
+
+# =============================================================================
+# BENCHMARK: python dsp_kernels.py [seconds]
+# =============================================================================
+def benchmark(seconds=10.0, sr=44100):
+    """Every available implementation side by side, plus the per-sample loop the engines used to run."""
+    x = np.random.default_rng(0).standard_normal(int(seconds * sr))
+    delay = int(0.35 * sr)
+    print(f"engine backend: {BACKEND} | {seconds:g}s of audio")
+    impls = [('numpy', one_pole_numpy, feedback_delay_numpy)]
+    if numba is not None:
+        t0 = time.perf_counter()
+        impls.insert(0, ('numba', numba.njit(cache=True)(one_pole_loop),
+                         numba.njit(cache=True)(feedback_delay_loop)))
+        impls[0][1](x[:4], 0.5, 0.5, 0.0)
+        impls[0][2](x[:4], np.zeros(2), 0, 0.5)
+        print(f"numba first call (compile or cache load): {(time.perf_counter() - t0) * 1000:.1f} ms")
+    else:
+        print("numba: not installed")
+    for name, one_pole_fn, delay_fn in impls:
+        t0 = time.perf_counter()
+        one_pole_fn(x, 0.36, 0.64, 0.0)
+        pole_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        delay_fn(x, np.zeros(delay), 0, 0.4)
+        delay_s = time.perf_counter() - t0
+        print(f"{name:6s} one_pole {seconds / pole_s:10.1f}x realtime | "
+              f"feedback_delay {seconds / delay_s:10.1f}x realtime")
+    # Reference: the per-sample Python the engines used to run (first second, scaled)
+    n = min(len(x), sr)
+    t0 = time.perf_counter()
+    last = 0.0
+    for s in x[:n].tolist():
+        last = last + 0.36 * (s - last)
+    pole_s = (time.perf_counter() - t0) * len(x) / n
+    buf, idx = [0.0] * delay, 0
+    t0 = time.perf_counter()
+    for s in x[:n].tolist():
+        d = buf[idx]
+        buf[idx] = s + 0.4 * d
+        idx = (idx + 1) % delay
+    delay_s = (time.perf_counter() - t0) * len(x) / n
+    print(f"{'loop':6s} one_pole {seconds / pole_s:10.1f}x realtime | "
+          f"feedback_delay {seconds / delay_s:10.1f}x realtime")
+
+if __name__ == "__main__":
+    benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -1,6 +1,12 @@
 import math
-import struct
-import wave
+import time
+import numpy as np
+import cabinet
+import drums
+import dsp_kernels
+import oversample
+import phrase_cache
+import pcm_encoder
 
 # =============================================================================
 # 1. CONFIGURATION & TUNING
@@ -9,9 +15,18 @@ CONFIG = {
     'SAMPLE_RATE': 44100,
     'BPM': 124,                  # Tempo from Tab
     'GAIN': 85.0,                # Extreme Distortion
+    'OVERSAMPLE': 4,             # Clipper oversampling: 1 (off) | 2 | 4 | 8
     'CAB_HZ': 3800,              # Celestion Speaker Sim
+    'CAB_IR': '4x12_closed',     # cabinet.CABINETS name (None = one-pole lowpass)
+    'CAB_BLOCK': 256,            # Convolution block: latency vs throughput
     'DELAY_MS': 363,             # Dotted 8th delay at 124 BPM (The secret sauce)
-    'MASTER_VOL': 0.8
+    'DRUMS': 'rock',             # drums.GROOVES name (None = no drums)
+    'DRUM_VOL': 0.5,
+    'PHRASE_CACHE_MB': 64,       # Dry-phrase reuse budget (0 = render every repeat)
+    'MASTER_VOL': 0.8,
+    'WAV_FORMAT': 'int16',       # 'int16' | 'int24' | 'float32'
+    'DITHER': False,             # TPDF dither on integer formats
+    'DITHER_SEED': None          # Dither noise seed (None = fresh noise every render)
 }
 
 # Standard Tuning Frequencies
@@ -24,31 +39,70 @@ def get_freq(string_name, fret):
 # =============================================================================
 # 2. THE PHYSICS ENGINE (DSP)
 # =============================================================================
+def preamp_loop(x, gain, alpha, state):
+    """Pre-amp high-pass + tanh + one-pole cab -> (pre-amp out, cab out, state).
+
+    The high-pass subtracts 0.1 * the previous one-pole cab output, so the
+    clipper and the cab sit inside its loop and have to run sample by
+    sample. The clip here is the plain tanh; the oversampled clipper and IR
+    cabinet that make the audible signal do not change how the pre-amp behaves.
+    """
+    pre = np.empty(len(x))
+    lp = np.empty(len(x))
+    for n in range(len(x)):
+        s = x[n] - state * 0.1
+        state = state + alpha * (math.tanh(s * gain) - state)
+        pre[n] = s
+        lp[n] = state
+    return pre, lp, state
+
+preamp = dsp_kernels.jit(preamp_loop, np.zeros(4), 1.0, 0.5, 0.0)
+
 class GuitarAmp:
     def __init__(self):
         self.sr = CONFIG['SAMPLE_RATE']
-        self.last_sample = 0.0
+        self.last_sample = 0.0  # One-pole cab output (the pre-amp feeds it back)
+        self.lp_sample = 0.0    # One-pole state over the oversampled clipper's output
+
+        # Cabinet low pass coefficient
+        rc = 1.0 / (2 * math.pi * CONFIG['CAB_HZ'])
+        dt = 1.0 / self.sr
+        self.alpha = dt / (rc + dt)
         
         # Delay Line (For the Intro)
         self.delay_len = int((CONFIG['DELAY_MS']/1000.0) * self.sr)
         self.delay_buf = [0.0] * self.delay_len
         self.d_idx = 0
 
+        # Anti-aliased clipper (runs at OVERSAMPLE x the rate, see oversample.py)
+        self.clipper = oversample.build_oversampler(oversample.tanh_shaper, CONFIG['OVERSAMPLE'])
+
+        # Speaker Cabinet (Impulse Response convolution, see cabinet.py)
+        self.cab = cabinet.build_cabinet(CONFIG['CAB_IR'], self.sr, CONFIG['CAB_BLOCK'],
+                                         cutoff=CONFIG['CAB_HZ'])
+
     def process(self, signal, is_lead=False):
         # 1. PRE-AMP (Mid Boost for "Jungle" Tone)
         # Simple high-pass to tighten low end before distortion
-        signal = signal - (self.last_sample * 0.1) 
+        signal = signal - (self.last_sample * 0.1)
         
         # 2. DISTORTION (Hyperbolic Tangent)
         drive = signal * (CONFIG['GAIN'] * 1.5 if is_lead else CONFIG['GAIN'])
-        distorted = math.tanh(drive)
-        
-        # 3. CABINET SIMULATION (Low Pass Filter)
-        rc = 1.0 / (2 * math.pi * CONFIG['CAB_HZ'])
-        dt = 1.0 / self.sr
-        alpha = dt / (rc + dt)
-        filtered = self.last_sample + alpha * (distorted - self.last_sample)
-        self.last_sample = filtered
+        clipped = math.tanh(drive)
+        distorted = self.clipper.process(drive) if self.clipper is not None else clipped
+
+        # 3. CABINET SIMULATION
+        # The one-pole low pass always runs: the pre-amp feeds back its output,
+        # never the convolver's, which lags a whole block behind
+        one_pole = self.last_sample + self.alpha * (clipped - self.last_sample)
+        self.last_sample = one_pole
+        if self.cab is not None:
+            filtered = self.cab.process(distorted)  # Speaker IR convolution
+        elif self.clipper is not None:
+            filtered = self.lp_sample + self.alpha * (distorted - self.lp_sample)
+            self.lp_sample = filtered
+        else:
+            filtered = one_pole
         
         # 4. DELAY (The Intro Effect)
         # We only apply heavy delay if it's the lead track
@@ -61,6 +115,32 @@ class GuitarAmp:
             
         return (filtered * 0.8) + wet
 
+    def process_array(self, signal, is_lead=False):
+        """process() over a whole block; the recurrences run in dsp_kernels."""
+        signal = np.asarray(signal, dtype=np.float64)
+        if not len(signal):
+            return signal
+        gain = CONFIG['GAIN'] * 1.5 if is_lead else CONFIG['GAIN']
+        pre, one_pole, self.last_sample = preamp(signal, gain, self.alpha, self.last_sample)
+        if self.clipper is None and self.cab is None:
+            filtered = one_pole
+        else:
+            drive = pre * gain
+            distorted = self.clipper.process_array(drive) if self.clipper is not None else np.tanh(drive)
+            if self.cab is not None:
+                filtered = self.cab.process_array(distorted)
+            else:
+                filtered, self.lp_sample = dsp_kernels.one_pole(distorted, self.alpha, 1.0 - self.alpha,
+                                                                self.lp_sample)
+
+        wet = 0.0
+        if is_lead:
+            delay = np.array(self.delay_buf)
+            delayed, self.d_idx = dsp_kernels.feedback_delay(filtered, delay, self.d_idx, 0.3)
+            self.delay_buf = delay.tolist()
+            wet = delayed * 0.4
+        return (filtered * 0.8) + wet
+
 def generate_string_pluck(freq, duration, type='pick'):
     """Generates raw string vibration physics"""
     sr = CONFIG['SAMPLE_RATE']
@@ -91,12 +171,23 @@ def generate_string_pluck(freq, duration, type='pick'):
 # =============================================================================
 # 3. THE SEQUENCER (Transcribing the Tab)
 # =============================================================================
+# Phrase events: (string frequencies, length in 16ths, pluck type)
+def note(freq, dur_16ths, type='pick'):
+    return ((freq,), dur_16ths, type)
+
+def rest(dur_16ths):
+    return ((), dur_16ths, None)
+
+def power(root, top, dur_16ths, palm=False):
+    return ((root, top), dur_16ths, 'pm' if palm else 'pick')
+
 class Sequencer:
     def __init__(self):
         self.track_1 = [] # Lead / Intro
         self.track_2 = [] # Rhythm
         self.beat_sec = 60.0 / CONFIG['BPM']
         self.sixteenth = self.beat_sec / 4.0
+        self.phrases = phrase_cache.PhraseCache(CONFIG['PHRASE_CACHE_MB'] * 2**20)
         
     def add_note(self, track_id, freq, dur_16ths, type='pick'):
         dur_sec = dur_16ths * self.sixteenth
@@ -110,6 +201,22 @@ class Sequencer:
         target = self.track_1 if track_id == 1 else self.track_2
         target.extend([0.0] * n)
 
+    def add_phrase(self, track_id, events):
+        """Appends a list of note/rest/power events; a repeated phrase is rendered once."""
+        def render():
+            audio = []
+            for freqs, dur_16ths, type in events:
+                dur_sec = dur_16ths * self.sixteenth
+                if not freqs:
+                    audio.extend([0.0] * int(dur_sec * CONFIG['SAMPLE_RATE']))
+                    continue
+                # Strings of a chord summed into one wave
+                strings = [generate_string_pluck(f, dur_sec, type) for f in freqs]
+                audio.extend(strings[0] if len(strings) == 1 else [sum(v) for v in zip(*strings)])
+            return audio
+        target = self.track_1 if track_id == 1 else self.track_2
+        target.extend(self.phrases.get((track_id, tuple(events)), render).tolist())
+
     def build_intro(self):
         # --- GUITAR 1: RIFF A (The Delay Riff) ---
         # D string: 4--4-2--2--0 (repeated)
@@ -120,15 +227,18 @@ class Sequencer:
         # Let's stick to your tab: D string 4, 2
         
         print("Sequencing Intro Riff A...")
-        for _ in range(4): # Play loop 4 times
+        riff_a = [
             # "4 -- 4"
-            self.add_note(1, f_B, 2, 'pm'); self.add_rest(1, 2) 
-            self.add_note(1, f_B, 2, 'pm'); self.add_rest(1, 2)
+            note(f_B, 2, 'pm'), rest(2),
+            note(f_B, 2, 'pm'), rest(2),
             # "2 -- 2"
-            self.add_note(1, f_A, 2, 'pm'); self.add_rest(1, 2)
-            self.add_note(1, f_A, 2, 'pm'); self.add_rest(1, 2)
+            note(f_A, 2, 'pm'), rest(2),
+            note(f_A, 2, 'pm'), rest(2),
             # "0" (on A string actually per tab context, let's use low A freq)
-            self.add_note(1, get_freq('A', 2), 2, 'pm'); self.add_rest(1, 14) # Long rest for fill
+            note(get_freq('A', 2), 2, 'pm'), rest(14), # Long rest for fill
+        ]
+        for _ in range(4): # Play loop 4 times
+            self.add_phrase(1, riff_a)
 
         # --- GUITAR 2: POWER CHORDS (B5 A5 G5 E5) ---
         # Enters after 2 loops of Gtr 1
@@ -150,10 +260,7 @@ class Sequencer:
             # Strumming physics (slight offset)
             dur = 16 # 1 bar each
             # Render chord as combined wave
-            root = generate_string_pluck(chord[0], dur * self.sixteenth, 'pick')
-            fifth = generate_string_pluck(chord[1], dur * self.sixteenth, 'pick')
-            combined = [r + f for r, f in zip(root, fifth)]
-            self.track_2.extend(combined)
+            self.add_phrase(2, [power(chord[0], chord[1], dur)])
 
     def build_main_riff(self):
         # --- THE MAIN VERSE RIFF ---
@@ -172,24 +279,29 @@ class Sequencer:
         t_A = get_freq('A', 7)
         t_G = get_freq('A', 5)
         
-        def play_power(root, top, dur, palm=False):
-            # Combined wave for rhythm track
-            s1 = generate_string_pluck(root, dur*self.sixteenth, 'pm' if palm else 'pick')
-            s2 = generate_string_pluck(top, dur*self.sixteenth, 'pm' if palm else 'pick')
-            mix = [x+y for x,y in zip(s1,s2)]
-            self.track_2.extend(mix)
-
+        # Combined wave for rhythm track
+        bar = [
+            power(r_A, t_A, 2), power(r_A, t_A, 2), # 7-7
+            power(r_G, t_G, 2), # 5
+            power(r_A, t_A, 2), power(r_A, t_A, 2), power(r_A, t_A, 2), # 7-7-7
+            power(r_G, t_G, 1), # 5
+            power(r_Gb, get_freq('A',4), 1), # 4
+            power(r_E, get_freq('A',2), 2), # 2 (E5)
+        ]
         for _ in range(4): # 4 Bars
-            play_power(r_A, t_A, 2); play_power(r_A, t_A, 2) # 7-7
-            play_power(r_G, t_G, 2) # 5
-            play_power(r_A, t_A, 2); play_power(r_A, t_A, 2); play_power(r_A, t_A, 2) # 7-7-7
-            play_power(r_G, t_G, 1) # 5
-            play_power(r_Gb, get_freq('A',4), 1) # 4
-            play_power(r_E, get_freq('A',2), 2) # 2 (E5)
+            self.add_phrase(2, bar)
 
         # Guitar 1 plays high scratches/shreds over this
         self.add_rest(1, 128) # Just silence on track 1 for clarity
 
+    def build_drums(self, n_samples):
+        """Hi-hats under the 4-bar intro riff, full kit from the chords on."""
+        seq = drums.DrumSequencer(drums.SampleBank(CONFIG['SAMPLE_RATE']), CONFIG['BPM'])
+        n_bars = math.ceil(n_samples / (seq.bar_sec * CONFIG['SAMPLE_RATE']))
+        seq.add_groove('hats', 0, 4)
+        seq.add_groove(CONFIG['DRUMS'], 4, n_bars - 4)
+        return seq.render(n_samples)
+
 # =============================================================================
 # 4. MIXER & RENDERER
 # =============================================================================
@@ -200,6 +312,7 @@ def main():
     # 1. Write the notes
     seq.build_intro()
     seq.build_main_riff()
+    print(f"Phrase cache: {seq.phrases.summary()}")
     
     # 2. Pad tracks to equal length
     max_len = max(len(seq.track_1), len(seq.track_2))
@@ -211,32 +324,30 @@ def main():
     amp2 = GuitarAmp()
     
     print("Processing Physics (Tube Saturation + Cabinet Convolution)...")
-    final_mix = []
+    dsp_kernels.warm_up()  # JIT compile / disk-cache load stays out of the timing
+    t0 = time.perf_counter()
+    # Track 1 (Lead) -> Amp 1 (With Delay)
+    s1 = amp1.process_array(seq.track_1, is_lead=True)
+    # Track 2 (Rhythm) -> Amp 2 (Dryer)
+    s2 = amp2.process_array(seq.track_2, is_lead=False)
+    dsp_seconds = time.perf_counter() - t0
+    print(f"Amp DSP: {max_len / CONFIG['SAMPLE_RATE'] / dsp_seconds:.1f}x realtime "
+          f"({dsp_kernels.BACKEND} kernels)")
     
-    for i in range(max_len):
-        # Track 1 (Lead) -> Amp 1 (With Delay)
-        s1 = amp1.process(seq.track_1[i], is_lead=True)
-        # Track 2 (Rhythm) -> Amp 2 (Dryer)
-        s2 = amp2.process(seq.track_2[i], is_lead=False)
-        
-        # Stereo Width (Pan Gtr 1 Left, Gtr 2 Right)
-        # Mix down to mono for safety, or simple stereo interleaving
-        # Let's do a centered mix for maximum power
-        mix = (s1 * 0.6) + (s2 * 0.6)
-        
-        # Hard Limiter
-        mix = max(-1.0, min(1.0, mix))
-        final_mix.append(mix)
+    # Stereo Width (Pan Gtr 1 Left, Gtr 2 Right)
+    # Mix down to mono for safety, or simple stereo interleaving
+    # Let's do a centered mix for maximum power
+    # + Hard Limiter
+    final_mix = (s1 * 0.6) + (s2 * 0.6)
+    if CONFIG['DRUMS'] is not None:
+        final_mix += seq.build_drums(max_len) * CONFIG['DRUM_VOL']
+    final_mix = np.clip(final_mix, -1.0, 1.0)
 
     # 4. Save to WAV
     print(f"Writing {len(final_mix)} samples to WAV...")
-    with wave.open('welcome_to_the_jungle.wav', 'w') as f:
-        f.setnchannels(1)
-        f.setsampwidth(2)
-        f.setframerate(CONFIG['SAMPLE_RATE'])
-        
-        data = struct.pack('<' + ('h'*len(final_mix)), *[int(s * 32767) for s in final_mix])
-        f.writeframes(data)
+    pcm_encoder.write_wav('welcome_to_the_jungle.wav', final_mix, CONFIG['SAMPLE_RATE'],
+                          fmt=CONFIG['WAV_FORMAT'], dither=CONFIG['DITHER'],
+                          seed=CONFIG['DITHER_SEED'])
         
     print("DONE. File 'welcome_to_the_jungle.wav' created.")
     print("WARNING: Volume is loud. Distortion is high.")
@@ -0,0 +1,304 @@
+import struct
+import weakref
+import numpy as np
+
+# =============================================================================
+# SHARED FLOAT -> PCM ENCODER
+# =============================================================================
+# Every engine renders floats in [-1, 1]. This module turns them into a WAV
+# file without ever building per-sample Python ints or giant struct formats:
+# samples are clipped, scaled and cast as whole NumPy blocks and streamed to
+# disk chunk by chunk.
+#
+#   'int16'   - 16-bit PCM (the classic CD format, default)
+#   'int24'   - 24-bit PCM (packed 3 bytes per sample)
+#   'float32' - 32-bit IEEE float (no quantization at all)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+FORMATS = {
+    # name:     (format tag, bytes per sample, full scale)
+    'int16':   (WAVE_FORMAT_PCM, 2, 32767.0),
+    'int24':   (WAVE_FORMAT_PCM, 3, 8388607.0),
+    'float32': (WAVE_FORMAT_IEEE_FLOAT, 4, 1.0),
+}
+
+DEFAULT_CHUNK = 65536  # Samples per block when draining generators
+RIFF_LIMIT = 0xFFFFFFFF  # The RIFF and data chunk sizes are 32-bit fields (~4 GiB)
+
+def tpdf_noise(n, rng):
+    """Triangular PDF dither noise, +/- 1 LSB peak (sum of two uniforms)."""
+    return rng.random(n) - rng.random(n)
+
+def encode_block(block, fmt='int16', dither=False, rng=None):
+    """Converts one float block to the raw little-endian bytes of `fmt`.
+
+    Without dither the int formats truncate toward zero, exactly like the
+    old `int(s * 32767)` packing, so existing renders stay bit-identical.
+    With dither, TPDF noise is added before rounding to the nearest step.
+    """
+    _, width, full_scale = FORMATS[fmt]
+    x = np.clip(np.asarray(block, dtype=np.float64).ravel(), -1.0, 1.0)
+
+    if fmt == 'float32':
+        return x.astype('<f4')
+
+    scaled = x * full_scale
+    if dither:
+        rng = rng if rng is not None else np.random.default_rng()
+        scaled = np.rint(scaled + tpdf_noise(len(scaled), rng))
+        np.clip(scaled, -full_scale - 1, full_scale, out=scaled)
+
+    if fmt == 'int16':
+        return scaled.astype('<i2')
+
+    # int24: keep the low 3 bytes of each little-endian int32
+    as_bytes = scaled.astype('<i4').view(np.uint8).reshape(-1, 4)
+    return np.ascontiguousarray(as_bytes[:, :3])
+
+def wav_header(sample_rate, fmt='int16', channels=1, n_frames=0):
+    """Builds a RIFF/WAVE header whose data chunk holds `n_frames` frames."""
+    tag, width, _ = FORMATS[fmt]
+    block_align = channels * width
+    data_size = n_frames * block_align
+    check_size(n_frames, fmt, channels)
+
+    if tag == WAVE_FORMAT_PCM:
+        fmt_chunk = struct.pack('<4sIHHIIHH', b'fmt ', 16, tag, channels,
+                                sample_rate, sample_rate * block_align,
+                                block_align, width * 8)
+        fact_chunk = b''
+    else:
+        # Non-PCM formats carry cbSize and a 'fact' chunk (frame count)
+        fmt_chunk = struct.pack('<4sIHHIIHHH', b'fmt ', 18, tag, channels,
+                                sample_rate, sample_rate * block_align,
+                                block_align, width * 8, 0)
+        fact_chunk = struct.pack('<4sII', b'fact', 4, n_frames)
+
+    body = b'WAVE' + fmt_chunk + fact_chunk + struct.pack('<4sI', b'data', data_size)
+    # RIFF chunks are word aligned: odd-sized data gets one pad byte
+    return struct.pack('<4sI', b'RIFF', len(body) + data_size + (data_size & 1)) + body
+
+def max_frames(fmt='int16', channels=1):
+    """Most frames a RIFF/WAVE file of this format can describe."""
+    # Bytes the RIFF size counts besides the data: 'WAVE', fmt (+ fact) and data headers
+    overhead = 36 if FORMATS[fmt][0] == WAVE_FORMAT_PCM else 50
+    return (RIFF_LIMIT - overhead - 1) // (channels * FORMATS[fmt][1])
+
+def check_size(n_frames, fmt='int16', channels=1):
+    """Raises ValueError if `n_frames` would overflow the 32-bit RIFF sizes."""
+    limit = max_frames(fmt, channels)
+    if n_frames > limit:
+        raise ValueError(f"{n_frames} frames of {channels}ch {fmt} exceed the 4 GiB WAV size "
+                         f"limit ({limit} frames); render shorter files")
+
+def iter_blocks(source, chunk_size=DEFAULT_CHUNK):
+    """Yields float blocks from an array, a list, or any iterable.
+
+    Iterables may produce either single samples (buffered up into
+    `chunk_size` blocks) or whole blocks (passed straight through).
+    """
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if isinstance(source, (list, tuple)):
+        for start in range(0, len(source), chunk_size):
+            yield np.asarray(source[start:start + chunk_size], dtype=np.float64)
+        return
+
+    pending = []
+    for item in source:
+        if np.ndim(item) == 0:
+            pending.append(item)
+            if len(pending) >= chunk_size:
+                yield np.asarray(pending, dtype=np.float64)
+                pending = []
+        else:
+            if pending:
+                yield np.asarray(pending, dtype=np.float64)
+                pending = []
+            yield item
+    if pending:
+        yield np.asarray(pending, dtype=np.float64)
+
+class WavWriter:
+    """Streaming WAV writer. Blocks go straight to disk; sizes are patched on close."""
+
+    def __init__(self, filename, sample_rate, fmt='int16', channels=1,
+                 dither=False, seed=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown WAV format '{fmt}' (choose from {list(FORMATS)})")
+        self.filename = filename
+        self.sample_rate = int(sample_rate)
+        self.fmt = fmt
+        self.channels = channels
+        self.dither = dither
+        self.rng = np.random.default_rng(seed)
+        self.n_samples = 0
+        self.f = open(filename, 'wb')
+        self.f.write(wav_header(self.sample_rate, fmt, channels))
+
+    def write(self, block):
+        data = encode_block(block, self.fmt, self.dither, self.rng)
+        check_size((self.n_samples + len(data)) // self.channels, self.fmt, self.channels)
+        self.f.write(memoryview(data).cast('B'))
+        self.n_samples += len(data)
+
+    def write_all(self, source, chunk_size=DEFAULT_CHUNK):
+        for block in iter_blocks(source, chunk_size):
+            self.write(block)
+
+    @property
+    def n_frames(self):
+        return self.n_samples // self.channels
+
+    def close(self):
+        if self.f is None:
+            return
+        if (self.n_samples * FORMATS[self.fmt][1]) & 1:
+            self.f.write(b'\x00')
+        # Rewrite the header now that the true length is known
+        self.f.seek(0)
+        self.f.write(wav_header(self.sample_rate, self.fmt, self.channels, self.n_frames))
+        self.f.close()
+        self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_wav(filename, samples, sample_rate, fmt='int16', dither=False,
+              channels=1, seed=None, chunk_size=DEFAULT_CHUNK):
+    """One-call helper: encode `samples` (array, list or generator) to `filename`."""
+    with WavWriter(filename, sample_rate, fmt, channels, dither, seed) as w:
+        w.write_all(samples, chunk_size)
+    return w.n_frames
+
+# =============================================================================
+# MEMORY-MAPPED OUTPUT (multi-hour renders)
+# =============================================================================
+# The file is preallocated with a valid header sized for `capacity_frames`
+# and its data region is mapped straight into memory. Blocks are clipped and
+# cast directly into the mapped samples, so there is no float buffer for
+# the whole song and no intermediate byte strings. If the render runs past
+# the capacity the file is grown; on close it is truncated to the real
+# length and the header is rewritten.
+#
+# Growing and truncating change the file under the mapping, which is only
+# safe once nothing maps it (Windows refuses to resize a mapped file, and
+# on Linux a view past the new end faults with SIGBUS). Views handed out
+# by reserve() must therefore be dropped before the next reserve()/write()
+# that needs to grow, and before close(); a live one raises RuntimeError.
+
+MMAP_DTYPES = {'int16': '<i2', 'float32': '<f4'}
+
+class MappedWavWriter:
+    """WAV writer backed by np.memmap over a preallocated data region."""
+
+    def __init__(self, filename, sample_rate, capacity_frames, fmt='int16',
+                 channels=1, dither=False, seed=None):
+        if fmt not in MMAP_DTYPES:
+            raise ValueError(f"Memory-mapped output supports {list(MMAP_DTYPES)}, not '{fmt}'")
+        self.filename = filename
+        self.sample_rate = int(sample_rate)
+        self.fmt = fmt
+        self.channels = channels
+        self.dither = dither
+        self.rng = np.random.default_rng(seed)
+        self.dtype = np.dtype(MMAP_DTYPES[fmt])
+        self.full_scale = FORMATS[fmt][2]
+        self.n_samples = 0
+        self.views = []  # Weak references to the reserve() views handed out
+
+        self.max_samples = max_frames(fmt, channels) * channels
+        capacity = max(1, int(capacity_frames)) * channels
+        # Header is written up front so even an interrupted render is playable
+        header = wav_header(self.sample_rate, fmt, channels, capacity // channels)
+        self.offset = len(header)
+        with open(filename, 'wb') as f:
+            f.write(header)
+            f.truncate(self.offset + capacity * self.dtype.itemsize)
+        self._map(capacity)
+
+    def _map(self, capacity):
+        self.capacity = capacity
+        self.data = np.memmap(self.filename, dtype=self.dtype, mode='r+',
+                              offset=self.offset, shape=(capacity,))
+
+    def _release_views(self, action):
+        if any(ref() is not None for ref in self.views):
+            raise RuntimeError(f"cannot {action} {self.filename}: views returned by reserve() "
+                               "are still alive (del them first)")
+        self.views = []
+
+    def _grow(self, needed):
+        check_size(needed // self.channels, self.fmt, self.channels)
+        self._release_views('grow')
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        capacity = min(capacity, self.max_samples)
+        self.data.flush()
+        del self.data
+        with open(self.filename, 'r+b') as f:
+            f.truncate(self.offset + capacity * self.dtype.itemsize)
+        self._map(capacity)
+
+    def reserve(self, n):
+        """Returns the next `n` mapped samples (raw dtype) and advances the cursor.
+
+        For renderers that already produce integer/float PCM in place. The view
+        must be dropped before the file grows or is closed (see above).
+        """
+        end = self.n_samples + n
+        if end > self.capacity:
+            self._grow(end)
+        view = self.data[self.n_samples:end]
+        self.n_samples = end
+        self.views = [ref for ref in self.views if ref() is not None]
+        self.views.append(weakref.ref(view))
+        return view
+
+    def write(self, block):
+        x = np.asarray(block, dtype=np.float64).ravel()
+        view = self.reserve(len(x))
+        if self.fmt == 'float32':
+            np.clip(x, -1.0, 1.0, out=view, casting='same_kind')
+            return
+        scaled = np.clip(x, -1.0, 1.0) * self.full_scale
+        if self.dither:
+            scaled = np.rint(scaled + tpdf_noise(len(scaled), self.rng))
+            np.clip(scaled, -self.full_scale - 1, self.full_scale, out=scaled)
+        # Truncating cast straight into the file, same as encode_block
+        np.copyto(view, scaled, casting='unsafe')
+
+    def write_all(self, source, chunk_size=DEFAULT_CHUNK):
+        for block in iter_blocks(source, chunk_size):
+            self.write(block)
+
+    @property
+    def n_frames(self):
+        return self.n_samples // self.channels
+
+    def close(self):
+        """Finalizes the file: drops unused capacity and patches the header."""
+        if self.data is None:
+            return
+        self._release_views('close')
+        self.data.flush()
+        self.data = None
+        data_size = self.n_samples * self.dtype.itemsize
+        with open(self.filename, 'r+b') as f:
+            f.truncate(self.offset + data_size)
+            f.seek(0)
+            f.write(wav_header(self.sample_rate, self.fmt, self.channels, self.n_frames))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
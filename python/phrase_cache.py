@@ -0,0 +1,63 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# =============================================================================
+# PHRASE CACHE // RENDER EACH DISTINCT BAR ONCE
+# =============================================================================
+# Song forms repeat: a 12-bar blues plays the same rhythm bar on the same
+# root dozens of times, a riff loops 4x. The composers synthesize dry audio
+# sample by sample in Python, so every repeat costs as much as the first.
+# Here a bar (or phrase) is described by its events -- the notes, rests and
+# techniques that fully determine its samples -- and the rendered DRY buffer
+# is stored under a fingerprint of them:
+#
+#   cache.get(('lead', ((329.6, 0.5, 'normal'), ...)), render_fn)
+#     -> render_fn() on a miss, the stored buffer on every later hit
+#
+# Only dry tracks are cached. The amps (filters, delays, cabinet) still run
+# over the whole assembled track, so a reused bar comes out of the amp with
+# the state left by whatever preceded it -- the output is bit-identical to
+# rendering every bar from scratch.
+#
+# Memory is bounded by `budget_bytes`; the least recently used buffers are
+# evicted first, and a budget of 0 turns the cache off.
+
+def fingerprint(key):
+    """Stable digest of a bar description (tuples of floats / ints / strings)."""
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+class PhraseCache:
+    """LRU map: bar fingerprint -> rendered dry samples, within a byte budget."""
+
+    def __init__(self, budget_bytes=64 * 2**20):
+        self.budget = int(budget_bytes)
+        self.buffers = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, render):
+        """Samples for the bar described by `key`; `render()` builds them on a miss."""
+        fp = fingerprint(key)
+        buf = self.buffers.get(fp)
+        if buf is not None:
+            self.buffers.move_to_end(fp)
+            self.hits += 1
+            return buf
+        self.misses += 1
+        buf = np.asarray(render(), dtype=np.float64)
+        buf.flags.writeable = False
+        if buf.nbytes <= self.budget:
+            while self.nbytes + buf.nbytes > self.budget:
+                _, old = self.buffers.popitem(last=False)
+                self.nbytes -= old.nbytes
+                self.evictions += 1
+            self.buffers[fp] = buf
+            self.nbytes += buf.nbytes
+        return buf
+
+    def summary(self):
+        return (f"{self.hits} reused / {self.misses} rendered, {len(self.buffers)} cached "
+                f"({self.nbytes / 2**20:.1f} of {self.budget / 2**20:.0f} MiB), {self.evictions} evicted")
@@ -0,0 +1,240 @@
+import argparse
+import ast
+import contextlib
+import copy
+import hashlib
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import dsp_kernels
+
+# =============================================================================
+# RENDER FARM // BATCH SONG GENERATION WITH A CONTENT-ADDRESSED CACHE
+# =============================================================================
+# Every engine is a script: edit CONFIG, run it, get one fixed filename in
+# the current directory. The farm runs many (engine, CONFIG overrides, seed)
+# jobs across a process pool instead, one job per worker at a time:
+#
+#   python render_farm.py jobs.json
+#   python render_farm.py -e voodoo -e gr --seeds 1 2 3 --set BPM=100
+#
+# where jobs.json is a list of {"engine": ..., "config": {...}, "seed": ...}.
+#
+# Each job's output is stored under a key that hashes everything that can
+# change its samples:
+#
+#   sha256(engine + source of the engine and every local module it imports
+#          + DSP backend (numba / python) + CONFIG overrides + seed)
+#
+# so a job whose key is already in the cache is skipped, and editing any DSP
+# module (cabinet.py, oversample.py, ...) invalidates exactly the engines
+# that import it. Per key the cache holds <key>.wav, the engine's console
+# output in <key>.log and <key>.json (job + timings, written last: a key
+# with no .json never finished).
+#
+# The seed drives `random`, `np.random` and, unless the job sets its own
+# 'DITHER_SEED', the encoder's dither noise, so every cached file can be
+# reproduced bit for bit.
+
+ENGINES = {  # module -> the file its main() writes
+    'attempt':    'guitar_universe.wav',
+    'voodoo':     'voodoo_blues_universe.wav',
+    'gr':         'welcome_to_the_jungle.wav',
+    'dragonfire': 'high_iq_solo.wav',
+}
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE = 'render_cache'
+KEY_CHARS = 16  # Hex digits of the sha256 used in file names
+
+# -----------------------------------------------------------------------------
+# Cache keys
+# -----------------------------------------------------------------------------
+def local_imports(module):
+    """Names of the modules next to this file that `module` imports (transitively)."""
+    seen = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(ENGINE_DIR, name + '.py'), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            pending += [n for n in names if os.path.exists(os.path.join(ENGINE_DIR, n + '.py'))]
+    return sorted(seen)
+
+def code_version(engine):
+    """Digest of the source of the engine and every local module it imports."""
+    h = hashlib.sha256()
+    for name in local_imports(engine):
+        with open(os.path.join(ENGINE_DIR, name + '.py'), 'rb') as f:
+            h.update(name.encode() + b'\0' + f.read() + b'\0')
+    return h.hexdigest()
+
+def job_key(job, code):
+    # Numba and the Python fallback agree only to rounding, so they cache apart
+    blob = json.dumps({'engine': job['engine'], 'code': code, 'backend': dsp_kernels.BACKEND,
+                       'config': job['config'], 'seed': job['seed']}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:KEY_CHARS]
+
+def cached(cache_dir, key):
+    return all(os.path.exists(os.path.join(cache_dir, key + ext)) for ext in ('.wav', '.json'))
+
+# -----------------------------------------------------------------------------
+# Worker
+# -----------------------------------------------------------------------------
+def render_job(job, key, cache_dir):
+    """Runs one engine in this worker process -> metadata dict (also saved as <key>.json)."""
+    engine = importlib.import_module(job['engine'])
+    unknown = set(job['config']) - set(engine.CONFIG)
+    if unknown:
+        raise KeyError(f"{job['engine']} has no CONFIG keys {sorted(unknown)}")
+
+    defaults = copy.deepcopy(engine.CONFIG)
+    cwd = os.getcwd()
+    t0 = time.perf_counter()
+    try:
+        engine.CONFIG.update(job['config'])
+        if 'DITHER_SEED' not in job['config']:
+            engine.CONFIG['DITHER_SEED'] = job['seed']
+        random.seed(job['seed'])
+        np.random.seed(job['seed'])
+        # The engine writes its fixed filename into a private scratch directory
+        with tempfile.TemporaryDirectory(dir=cache_dir) as scratch, \
+                open(os.path.join(cache_dir, key + '.log'), 'w') as log:
+            os.chdir(scratch)
+            with contextlib.redirect_stdout(log):
+                engine.main()
+            os.replace(ENGINES[job['engine']], os.path.join(cache_dir, key + '.wav'))
+            os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+        engine.CONFIG.clear()
+        engine.CONFIG.update(defaults)
+
+    meta = dict(job, key=key, backend=dsp_kernels.BACKEND, seconds=time.perf_counter() - t0, pid=os.getpid(),
+                finished=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    tmp = os.path.join(cache_dir, key + '.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(cache_dir, key + '.json'))
+    return meta
+
+# -----------------------------------------------------------------------------
+# Farm
+# -----------------------------------------------------------------------------
+def normalize(job):
+    if job.get('engine') not in ENGINES:
+        raise ValueError(f"unknown engine {job.get('engine')!r} (choose from {list(ENGINES)})")
+    return {'engine': job['engine'], 'config': dict(job.get('config') or {}),
+            'seed': int(job.get('seed', 0))}
+
+def describe(job):
+    overrides = ' '.join(f"{k}={json.dumps(v)}" for k, v in sorted(job['config'].items()))
+    return f"{job['engine']} seed={job['seed']}" + (f" {overrides}" if overrides else '')
+
+def run_farm(jobs, cache_dir=DEFAULT_CACHE, workers=None, force=False):
+    """Renders every job not already cached; returns [(job, key, status, seconds)]."""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_dir = os.path.abspath(cache_dir)
+    jobs = [normalize(job) for job in jobs]
+    codes = {engine: code_version(engine) for engine in {job['engine'] for job in jobs}}
+
+    results, todo = [], {}
+    for job in jobs:
+        key = job_key(job, codes[job['engine']])
+        if key in todo:
+            continue  # Same job listed twice
+        if not force and cached(cache_dir, key):
+            results.append((job, key, 'cached', 0.0))
+            print(f"[cached]  {describe(job)} -> {key}.wav")
+        else:
+            todo[key] = job
+
+    t0 = time.perf_counter()
+    if todo:
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        print(f"Rendering {len(todo)} job(s) on {workers} worker(s), cache: {cache_dir}")
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(render_job, job, key, cache_dir): key for key, job in todo.items()}
+            for done, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                job = todo[key]
+                try:
+                    seconds = future.result()['seconds']
+                    status = 'rendered'
+                    print(f"[{done}/{len(todo)}] {describe(job)} -> {key}.wav in {seconds:.1f}s")
+                except Exception as e:
+                    seconds, status = 0.0, f"failed: {e!r}"
+                    log = os.path.join(cache_dir, key + '.log')
+                    hint = f" (see {log})" if os.path.exists(log) else ''
+                    print(f"[{done}/{len(todo)}] {describe(job)} FAILED: {e!r}{hint}")
+                results.append((job, key, status, seconds))
+    wall = time.perf_counter() - t0
+
+    rendered = [r for r in results if r[2] == 'rendered']
+    job_seconds = sum(r[3] for r in rendered)
+    print(f"{len(rendered)} rendered, {sum(r[2] == 'cached' for r in results)} cached, "
+          f"{sum(r[2].startswith('failed') for r in results)} failed | "
+          f"{job_seconds:.1f}s of render time in {wall:.1f}s wall")
+    return results
+
+def parse_value(text):
+    """--set values are JSON (numbers, null, true, "str"); anything else stays a string."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render-farm: batch engine renders with a result cache")
+    parser.add_argument('jobs', nargs='?', default=None,
+                        help="JSON file: list of {\"engine\", \"config\", \"seed\"} jobs")
+    parser.add_argument('-e', '--engine', action='append', default=[], choices=sorted(ENGINES),
+                        help="Engine to render (repeatable; one job per engine per seed)")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0],
+                        help="Seeds for the --engine jobs")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="CONFIG override for the --engine jobs (repeatable)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE,
+                        help="Cache directory (default: %(default)s)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-render jobs that are already cached")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    jobs = []
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobs += json.load(f)
+    overrides = {}
+    for item in args.set:
+        name, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"--set expects KEY=VALUE, got {item!r}")
+        overrides[name] = parse_value(value)
+    jobs += [{'engine': e, 'config': overrides, 'seed': s} for e in args.engine for s in args.seeds]
+    if not jobs:
+        build_parser().error("give a jobs file or at least one --engine")
+    results = run_farm(jobs, args.cache, args.workers, args.force)
+    sys.exit(1 if any(r[2].startswith('failed') for r in results) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import gr
+
+# =============================================================================
+# LEGACY TONE CHECK: python -m pytest test_gr.py (or python test_gr.py)
+# =============================================================================
+# With OVERSAMPLE=1 and CAB_IR=None the amp must sound exactly like the
+# original per-sample GuitarAmp.process, reproduced below as the reference.
+
+LEGACY = {'OVERSAMPLE': 1, 'CAB_IR': None}
+
+def reference_amp(signal, is_lead, config):
+    """The original GuitarAmp.process, run over a list of samples."""
+    sr = config['SAMPLE_RATE']
+    last_sample = 0.0
+    delay_len = int((config['DELAY_MS'] / 1000.0) * sr)
+    delay_buf = [0.0] * delay_len
+    d_idx = 0
+    out = []
+    for s in signal:
+        s = s - (last_sample * 0.1)
+        drive = s * (config['GAIN'] * 1.5 if is_lead else config['GAIN'])
+        distorted = math.tanh(drive)
+        rc = 1.0 / (2 * math.pi * config['CAB_HZ'])
+        dt = 1.0 / sr
+        alpha = dt / (rc + dt)
+        filtered = last_sample + alpha * (distorted - last_sample)
+        last_sample = filtered
+        wet = 0.0
+        if is_lead:
+            delayed = delay_buf[d_idx]
+            delay_buf[d_idx] = filtered + (delayed * 0.3)
+            d_idx = (d_idx + 1) % delay_len
+            wet = delayed * 0.4
+        out.append((filtered * 0.8) + wet)
+    return np.array(out)
+
+def legacy_amp():
+    saved = {k: gr.CONFIG[k] for k in LEGACY}
+    gr.CONFIG.update(LEGACY)
+    try:
+        return gr.GuitarAmp()
+    finally:
+        gr.CONFIG.update(saved)
+
+def noise(n=20000, seed=0):
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, n)
+
+def test_process_array_matches_legacy_amp():
+    x = noise()
+    for is_lead in (False, True):
+        expected = reference_amp(x, is_lead, gr.CONFIG)
+        amp = legacy_amp()
+        # Two calls: the pre-amp state must carry across blocks
+        got = np.concatenate([amp.process_array(x[:7000], is_lead),
+                              amp.process_array(x[7000:], is_lead)])
+        np.testing.assert_allclose(got, expected, rtol=0, atol=1e-12)
+
+def test_process_matches_legacy_amp():
+    x = noise(5000, seed=1)
+    for is_lead in (False, True):
+        amp = legacy_amp()
+        got = np.array([amp.process(s, is_lead) for s in x])
+        np.testing.assert_allclose(got, reference_amp(x, is_lead, gr.CONFIG), rtol=0, atol=1e-12)
+
+if __name__ == "__main__":
+    test_process_array_matches_legacy_amp()
+    test_process_matches_legacy_amp()
+    print("OK: legacy GuitarAmp tone matches sample for sample")
@@ -1,21 +1,21 @@
-import math
 import wave
-import struct
+import numpy as np
 
 def generate_tone(frequency, duration_ms, sample_rate=44100, volume=0.5):
-    """Generates a list of samples for a sine wave tone."""
+    """Generates an array of samples for a sine wave tone."""
     num_samples = int(sample_rate * (duration_ms / 1000.0))
-    samples = []
-    for i in range(num_samples):
-        # Apply a simple envelope (fade in/out) to avoid clicking
-        envelope = 1.0
-        if i < 500: envelope = i / 500.0
-        if i > num_samples - 500: envelope = (num_samples - i) / 500.0
-        
-        # Simple Sine Wave
-        value = volume * envelope * math.sin(2 * math.pi * frequency * (i / sample_rate))
-        samples.append(value)
-    return samples
+    i = np.arange(num_samples, dtype=np.float64)
+
+    # Apply a simple envelope (fade in/out) to avoid clicking
+    # Precomputed ramps: same shape as the per-sample version, one pass each
+    envelope = np.ones(num_samples)
+    fade = min(500, num_samples)
+    envelope[:fade] = i[:fade] / 500.0
+    tail = i > num_samples - 500
+    envelope[tail] = (num_samples - i[tail]) / 500.0
+
+    # Simple Sine Wave
+    return volume * envelope * np.sin(2 * np.pi * frequency * (i / sample_rate))
 
 def note_freq(string_base_freq, fret):
     """Calculates frequency of a note given string base freq and fret number."""
@@ -23,18 +23,15 @@ def note_freq(string_base_freq, fret):
 
 def save_wav(filename, samples, sample_rate=44100):
     """Saves the generated samples to a .wav file."""
-    packed_samples = []
     max_amp = 32767  # 16-bit PCM
-    for s in samples:
-        # Clip samples
-        s = max(-1.0, min(1.0, s))
-        packed_samples.append(struct.pack('h', int(s * max_amp)))
-    
+    # Clip + convert to little-endian int16 in one shot
+    pcm = (np.clip(samples, -1.0, 1.0) * max_amp).astype('<i2')
+
     with wave.open(filename, 'w') as wf:
         wf.setnchannels(1)      # Mono
         wf.setsampwidth(2)      # 16-bit
         wf.setframerate(sample_rate)
-        wf.writeframes(b''.join(packed_samples))
+        wf.writeframes(memoryview(pcm).cast('B'))
     print(f"Generated {filename}")
 
 # Standard Guitar String Frequencies (Standard Tuning)
@@ -72,12 +69,12 @@ melody = [
 ]
 
 # Compile the full audio data
-full_audio = []
 sample_rate = 44100
 
-for string_freq, fret, duration in melody:
-    freq = note_freq(string_freq, fret)
-    full_audio.extend(generate_tone(freq, duration, sample_rate))
+full_audio = np.concatenate([
+    generate_tone(note_freq(string_freq, fret), duration, sample_rate)
+    for string_freq, fret, duration in melody
+])
 
 # Save the file
 save_wav("under_a_glass_moon_intro.wav", full_audio)
\ No newline at end of file
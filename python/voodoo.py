@@ -1,7 +1,13 @@
 import math
-import struct
-import wave
 import random
+import time
+import numpy as np
+import cabinet
+import drums
+import dsp_kernels
+import oversample
+import phrase_cache
+import pcm_encoder
 
 # =============================================================================
 # 1. THE VINTAGE TONE CONFIGURATION
@@ -11,8 +17,18 @@ CONFIG = {
     'BPM': 90,               # Slow, heavy blues groove
     'DURATION_BARS': 48,     # Long form (approx 3 mins)
     'DRIVE': 4.0,            # Fuzz Face gain
+    'OVERSAMPLE': 4,         # Clipper oversampling: 1 (off) | 2 | 4 | 8
     'UNIVIBE_SPEED': 4.0,    # Swirling pulse speed (Hz)
-    'MASTER_VOL': 0.75
+    'CAB_HZ': 3500,          # 4x12 speaker roll-off
+    'CAB_IR': '4x12_closed', # cabinet.CABINETS name (None = one-pole lowpass)
+    'CAB_BLOCK': 256,        # Convolution block: latency vs throughput
+    'DRUMS': 'blues_shuffle',  # drums.GROOVES name (None = no drums)
+    'DRUM_VOL': 0.5,
+    'PHRASE_CACHE_MB': 64,   # Dry-bar reuse budget (0 = render every bar)
+    'MASTER_VOL': 0.75,
+    'WAV_FORMAT': 'int16',   # 'int16' | 'int24' | 'float32'
+    'DITHER': False,         # TPDF dither on integer formats
+    'DITHER_SEED': None      # Dither noise seed (None = fresh noise every render)
 }
 
 # Frequencies for Key of E (Hendrix/Clapton favorite)
@@ -40,6 +56,14 @@ class VintageAmp:
         self.delay_buf = [0.0] * 12000
         self.d_idx = 0
 
+        # Anti-aliased fuzz (runs at OVERSAMPLE x the rate, see oversample.py)
+        self.shaper = oversample.asymmetric_shaper(0.8)
+        self.clipper = oversample.build_oversampler(self.shaper, CONFIG['OVERSAMPLE'])
+
+        # Speaker Cabinet (Impulse Response convolution, see cabinet.py)
+        self.cab = cabinet.build_cabinet(CONFIG['CAB_IR'], CONFIG['SR'], CONFIG['CAB_BLOCK'],
+                                         cutoff=CONFIG['CAB_HZ'])
+
     def process(self, signal, is_lead=True):
         # 1. UNIVIBE SIMULATION (Amplitude + Phase modulation)
         # Creates that underwater/swirling sound
@@ -63,19 +87,24 @@ class VintageAmp:
         driven = signal * gain
         
         # Soft Clip (Tanh) but asymmetrical
-        if driven > 0:
+        if self.clipper is not None:
+            distorted = self.clipper.process(driven)
+        elif driven > 0:
             distorted = math.tanh(driven)
         else:
             distorted = math.tanh(driven * 0.8) / 0.8
 
         # 4. MARSHALL CABINET SIMULATION (Steep Low Pass)
         # 4x12 Speaker emulation - cuts everything above 3.5kHz
-        # Simple RC filter implementation
-        rc = 1.0 / (2 * math.pi * 3500)
-        dt = 1.0 / CONFIG['SR']
-        alpha = dt / (rc + dt)
-        filtered = self.last + alpha * (distorted - self.last)
-        self.last = filtered
+        if self.cab is not None:
+            filtered = self.cab.process(distorted)
+        else:
+            # Simple RC filter implementation
+            rc = 1.0 / (2 * math.pi * CONFIG['CAB_HZ'])
+            dt = 1.0 / CONFIG['SR']
+            alpha = dt / (rc + dt)
+            filtered = self.last + alpha * (distorted - self.last)
+            self.last = filtered
 
         # 5. STADIUM DELAY/REVERB
         # Long tail echo
@@ -85,6 +114,38 @@ class VintageAmp:
 
         return (filtered * 0.7) + (d_out * 0.25)
 
+    def process_array(self, signal, is_lead=True):
+        """process() over a whole block; the recurrences run in dsp_kernels."""
+        signal = np.asarray(signal, dtype=np.float64)
+        step = CONFIG['UNIVIBE_SPEED'] / CONFIG['SR']
+        phase = self.lfo_phase + step * np.arange(1, len(signal) + 1)
+        self.lfo_phase += step * len(signal)
+        if is_lead:
+            signal = signal * (1.0 + 0.3 * np.sin(phase * 2 * math.pi))
+
+        cutoff = 0.15 if is_lead else 0.3
+        signal, self.lp_state = dsp_kernels.one_pole(signal, cutoff, 1.0 - cutoff, self.lp_state)
+
+        gain = CONFIG['DRIVE'] * 1.5 if is_lead else CONFIG['DRIVE'] * 0.8
+        driven = signal * gain
+        if self.clipper is not None:
+            distorted = self.clipper.process_array(driven)
+        else:
+            distorted = self.shaper(driven)
+
+        if self.cab is not None:
+            filtered = self.cab.process_array(distorted)
+        else:
+            rc = 1.0 / (2 * math.pi * CONFIG['CAB_HZ'])
+            dt = 1.0 / CONFIG['SR']
+            alpha = dt / (rc + dt)
+            filtered, self.last = dsp_kernels.one_pole(distorted, alpha, 1.0 - alpha, self.last)
+
+        delay = np.array(self.delay_buf)
+        d_out, self.d_idx = dsp_kernels.feedback_delay(filtered, delay, self.d_idx, 0.4)
+        self.delay_buf = delay.tolist()
+        return (filtered * 0.7) + (d_out * 0.25)
+
 def vintage_osc(freq, t, type='warm'):
     """Generates a warmer, band-limited waveform"""
     if freq <= 0: return 0.0
@@ -109,7 +170,9 @@ class BluesMan:
     def __init__(self):
         self.track_lead = []
         self.track_rhythm = []
+        self.bar_roots = []  # Progression root of every bar (for the bass)
         self.samples_per_beat = int((60 / CONFIG['BPM']) * CONFIG['SR'])
+        self.phrases = phrase_cache.PhraseCache(CONFIG['PHRASE_CACHE_MB'] * 2**20)
         
         # EXPANDED SCALE: 2 Octaves of E Minor Pentatonic + Blues Note
         # This prevents the "Index Error" and allows higher solos
@@ -118,7 +181,7 @@ class BluesMan:
             15, 17, 18, 19, 22, 24, 27 # Octave 2
         ]
 
-    def render_note(self, freq, duration_beats, track='lead', technique='normal'):
+    def note_samples(self, freq, duration_beats, track='lead', technique='normal'):
         n_samples = int(duration_beats * self.samples_per_beat)
         samples = []
         
@@ -149,8 +212,18 @@ class BluesMan:
             
             samples.append(raw * env)
             
-        if track == 'lead': self.track_lead.extend(samples)
-        else: self.track_rhythm.extend(samples)
+        return samples
+
+    def render_bar(self, track, notes):
+        """Appends one bar of (freq, beats, technique) notes; a repeated bar is rendered once."""
+        def render():
+            samples = []
+            for freq, beats, technique in notes:
+                samples.extend(self.note_samples(freq, beats, track, technique))
+            return samples
+        bar = self.phrases.get((track, tuple(notes)), render).tolist()
+        if track == 'lead': self.track_lead.extend(bar)
+        else: self.track_rhythm.extend(bar)
 
     def generate_blues(self):
         # 12 Bar Blues Progression in E
@@ -168,12 +241,13 @@ class BluesMan:
             # Construct E7#9 shape shifted
             root = get_freq(root_offset, 1) # Low root
             # Render chord as mono mix
-            self.render_note(root, beats, 'rhythm')
+            self.render_bar('rhythm', [(root, beats, 'normal')])
         
         # Lead: Improvisation
         def play_lick(root_offset):
             # Choose a lick template
             lick_type = random.choice(['slow_bend', 'rapid_fire', 'silence'])
+            notes = []
             
             if lick_type == 'slow_bend':
                 # Clapton style: Long emotional note
@@ -181,8 +255,8 @@ class BluesMan:
                 idx = (random.randint(2, 5) + int(root_offset/2)) % len(self.scale)
                 note = self.scale[idx]
                 freq = get_freq(note, 3)
-                self.render_note(freq, 2.0, 'lead', 'bend')
-                self.render_note(0, 2.0, 'lead') # Space
+                notes.append((freq, 2.0, 'bend'))
+                notes.append((0, 2.0, 'normal')) # Space
                 
             elif lick_type == 'rapid_fire':
                 # Hendrix style: Hammer-ons
@@ -194,10 +268,12 @@ class BluesMan:
                     
                     note = self.scale[safe_idx]
                     freq = get_freq(note, 3)
-                    self.render_note(freq, 0.5, 'lead')
+                    notes.append((freq, 0.5, 'normal'))
             
             else:
-                self.render_note(0, 4.0, 'lead') # Let the rhythm breathe
+                notes.append((0, 4.0, 'normal')) # Let the rhythm breathe
+
+            self.render_bar('lead', notes)
 
         # GENERATE SECTIONS
         print("Composing 12-Bar Blues Cycles...")
@@ -210,12 +286,26 @@ class BluesMan:
             
             # Rhythm Track
             play_chord(current_root, 4.0) # 4 beats per bar
+            self.bar_roots.append(current_root)
             
             # Lead Track
             play_lick(current_root)
             
             bars_generated += 1
 
+        print(f"Phrase cache: {self.phrases.summary()}")
+
+    def build_drums(self, n_samples):
+        """Shuffle kit + 808 on the bar roots (one-shots mixed by drums.DrumSequencer)."""
+        seq = drums.DrumSequencer(drums.SampleBank(CONFIG['SR']), CONFIG['BPM'])
+        seq.add_groove(CONFIG['DRUMS'], 0, len(self.bar_roots))
+        for bar, root in enumerate(self.bar_roots):
+            # Beats 1 and 3, an octave under the rhythm guitar
+            for beat in (0, 2):
+                seq.add(bar * seq.bar_sec + beat * seq.beat_sec, 'bass808', 0.5,
+                        freq=get_freq(root, 0), duration=seq.beat_sec * 2)
+        return seq.render(n_samples)
+
 # =============================================================================
 # 4. RENDERER
 # =============================================================================
@@ -230,35 +320,34 @@ def main():
     amp_lead = VintageAmp()
     amp_rhythm = VintageAmp()
     
-    final_mix = []
-    
     # Pad to equal length
     max_len = max(len(blues.track_lead), len(blues.track_rhythm))
     blues.track_lead += [0.0] * (max_len - len(blues.track_lead))
     blues.track_rhythm += [0.0] * (max_len - len(blues.track_rhythm))
     
-    # Mixdown
-    for i in range(max_len):
-        # Process Lead (Louder, Fuzzier)
-        s_lead = amp_lead.process(blues.track_lead[i], is_lead=True)
-        
-        # Process Rhythm (Cleaner, Thinner)
-        s_rhythm = amp_rhythm.process(blues.track_rhythm[i], is_lead=False)
-        
-        # Sum
-        mix = s_lead + (s_rhythm * 0.6)
-        
-        # Master Limiter
-        mix = max(-1.0, min(1.0, mix * CONFIG['MASTER_VOL']))
-        final_mix.append(mix)
+    # Mixdown (whole tracks through each amp)
+    dsp_kernels.warm_up()  # JIT compile / disk-cache load stays out of the timing
+    t0 = time.perf_counter()
+    # Process Lead (Louder, Fuzzier)
+    s_lead = amp_lead.process_array(blues.track_lead, is_lead=True)
+    
+    # Process Rhythm (Cleaner, Thinner)
+    s_rhythm = amp_rhythm.process_array(blues.track_rhythm, is_lead=False)
+    dsp_seconds = time.perf_counter() - t0
+    
+    # Drums (dry, straight to the mix)
+    s_drums = 0.0
+    if CONFIG['DRUMS'] is not None:
+        s_drums = blues.build_drums(max_len) * CONFIG['DRUM_VOL']
+    
+    # Sum + Master Limiter
+    final_mix = np.clip((s_lead + (s_rhythm * 0.6) + s_drums) * CONFIG['MASTER_VOL'], -1.0, 1.0)
+    print(f"Amp DSP: {max_len / CONFIG['SR'] / dsp_seconds:.1f}x realtime ({dsp_kernels.BACKEND} kernels)")
         
     # Write File
-    with wave.open('voodoo_blues_universe.wav', 'w') as f:
-        f.setnchannels(1)
-        f.setsampwidth(2)
-        f.setframerate(CONFIG['SR'])
-        data = struct.pack('<' + ('h'*len(final_mix)), *[int(s * 32767) for s in final_mix])
-        f.writeframes(data)
+    pcm_encoder.write_wav('voodoo_blues_universe.wav', final_mix, CONFIG['SR'],
+                          fmt=CONFIG['WAV_FORMAT'], dither=CONFIG['DITHER'],
+                          seed=CONFIG['DITHER_SEED'])
         
     print("DONE. 'voodoo_blues_universe.wav' is ready.")
     print("Turn the volume up.")